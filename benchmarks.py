@@ -0,0 +1,480 @@
+"""Benchmarks for the school and hospital systems.
+
+Run a single benchmark by name, e.g. ``python benchmarks.py school_startup``.
+Run ``python benchmarks.py`` with no arguments to list them.
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def bench_school_startup(runs=5):
+    """Measure school_system import cost and time to the first menu prompt."""
+    # python -X importtime writes one line per module to stderr:
+    # "import time: self [us] | cumulative | imported package"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import school_system"],
+        cwd=BASE_DIR, capture_output=True, text=True, check=True
+    )
+    cumulative = 0
+    slowest = []
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        module = parts[2].rstrip()
+        if module.strip() == "school_system":
+            cumulative = int(parts[1])
+        # Top level modules have no extra indentation
+        if not module.startswith("  "):
+            slowest.append((int(parts[1]), module.strip()))
+    slowest.sort(reverse=True)
+
+    print(f"import school_system (cumulative): {cumulative / 1000:.1f} ms")
+    print("Slowest top level imports:")
+    for micros, module in slowest[:5]:
+        print(f"  {module}: {micros / 1000:.1f} ms")
+
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, "school_system.py"],
+            cwd=BASE_DIR, stdin=subprocess.PIPE, stdout=subprocess.PIPE
+        )
+        output = b""
+        while b"Enter your choice" not in output:
+            chunk = os.read(process.stdout.fileno(), 4096)
+            if not chunk:
+                break
+            output += chunk
+        timings.append(time.perf_counter() - start)
+        process.communicate(b"14\n")
+
+    timings.sort()
+    print(f"Time to first prompt over {runs} runs: "
+          f"best {timings[0] * 1000:.1f} ms, median {timings[len(timings) // 2] * 1000:.1f} ms")
+
+
+def bench_specialty_search(doctor_count=10000, days=365, slots_per_day=8, specialties=20):
+    """Time earliest-slot queries across a specialty in hospital.py."""
+    import hospital
+    from datetime import date, timedelta
+
+    # Fixture accounts don't need the slow password hash
+    hospital.PASSWORD_ITERATIONS = 1
+    start = date(2030, 1, 1)
+    dates = [(start + timedelta(days=day)).isoformat() for day in range(days)]
+    times = [f"{9 + hour:02d}:00" for hour in range(slots_per_day)]
+    # One shared set of slot tuples; each doctor gets their own list of them
+    template = [(day, time) for day in dates for time in times]
+
+    build_start = time.perf_counter()
+    for number in range(doctor_count):
+        doctor = hospital.Doctor(f"doc{number}", "password", "contact",
+                                 f"Doctor {number}", f"Specialty {number % specialties}")
+        # Doctors open their calendars on different days
+        doctor.slots = template[(number * 37 % days) * slots_per_day:]
+        hospital.add_doctor(doctor)
+    print(f"Built {doctor_count} doctors x {len(template)} slots in "
+          f"{time.perf_counter() - build_start:.1f} s")
+
+    queries = 0
+    query_start = time.perf_counter()
+    for week in range(0, days, 7):
+        window_start, window_end = dates[week], dates[min(week + 6, days - 1)]
+        for specialty in range(specialties):
+            hospital.earliest_slot(f"Specialty {specialty}", window_start, window_end)
+            queries += 1
+    elapsed = time.perf_counter() - query_start
+    print(f"{queries} earliest-slot queries ({doctor_count // specialties} doctors each) "
+          f"in {elapsed:.2f} s: {elapsed / queries * 1000:.2f} ms per query")
+
+
+class _PlainAppointment:
+    """Dict-backed appointment, as hospital.Appointment was before __slots__."""
+    def __init__(self, appointment_id, doctor_id, patient_id, date, time, reason):
+        self.appointment_id = appointment_id
+        self.doctor_id = doctor_id
+        self.patient_id = patient_id
+        self.date = date
+        self.time = time
+        self.reason = reason
+        self.status = "Scheduled"
+
+
+class _PlainPrescription:
+    """Dict-backed prescription with medication dictionaries."""
+    def __init__(self, prescription_id, doctor_id, patient_id, date, medications):
+        self.prescription_id = prescription_id
+        self.doctor_id = doctor_id
+        self.patient_id = patient_id
+        self.date = date
+        self.medications = medications
+
+
+def _bytes_per_record(build, lines):
+    """Return the traced memory per record kept alive by build()."""
+    import tracemalloc
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    records = [build(json.loads(line)) for line in lines]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del records
+    return (after - before) / len(lines)
+
+
+def bench_hospital_memory(count=100000, doctor_count=200, patient_count=20000):
+    """Compare bytes per appointment/prescription record before and after __slots__."""
+    import hospital
+
+    # Records are decoded from JSON lines, like a reload from the change log,
+    # so every repeated ID, date and status starts out as a separate string
+    appointment_lines = [json.dumps({
+        "appointment_id": f"A{number}", "doctor_id": f"doc{number % doctor_count}",
+        "patient_id": f"pat{number % patient_count}", "date": f"2030-01-{number % 28 + 1:02d}",
+        "time": f"{9 + number % 8:02d}:00", "reason": "Check-up", "status": "Scheduled"
+    }) for number in range(count)]
+    prescription_lines = [json.dumps({
+        "prescription_id": f"P{number}", "doctor_id": f"doc{number % doctor_count}",
+        "patient_id": f"pat{number % patient_count}", "date": f"2030-01-{number % 28 + 1:02d}",
+        "medications": [
+            {"name": "Paracetamol", "dosage": "500mg", "instructions": "Take one tablet every 8 hours"},
+            {"name": "Ibuprofen", "dosage": "200mg", "instructions": "Take with food"}
+        ]
+    }) for number in range(count)]
+
+    def plain_appointment(data):
+        appointment = _PlainAppointment(data["appointment_id"], data["doctor_id"], data["patient_id"],
+                                        data["date"], data["time"], data["reason"])
+        appointment.status = data["status"]
+        return appointment
+
+    def plain_prescription(data):
+        return _PlainPrescription(data["prescription_id"], data["doctor_id"], data["patient_id"],
+                                  data["date"], data["medications"])
+
+    results = [
+        ("Appointment", plain_appointment, hospital.Appointment.from_dict, appointment_lines),
+        ("Prescription", plain_prescription, hospital.Prescription.from_dict, prescription_lines),
+    ]
+    for name, before, after, lines in results:
+        plain = _bytes_per_record(before, lines)
+        compact = _bytes_per_record(after, lines)
+        print(f"{name}: {plain:.0f} bytes/record before, {compact:.0f} after "
+              f"({(1 - compact / plain) * 100:.0f}% smaller)")
+
+
+def bench_batch_scheduler(request_count=100000, doctor_count=1000, specialties=20, days=30, slots_per_day=8):
+    """Time hospital.schedule_batch placing referral requests into doctor slots."""
+    import random
+    import tempfile
+    from datetime import date, timedelta
+
+    import hospital
+
+    # Fixture accounts don't need the slow password hash
+    hospital.PASSWORD_ITERATIONS = 1
+    folder = tempfile.mkdtemp()
+    hospital.store = hospital.HospitalStore(os.path.join(folder, "snapshot.json"),
+                                            os.path.join(folder, "log.jsonl"))
+    start = date(2030, 1, 1)
+    dates = [(start + timedelta(days=day)).isoformat() for day in range(days)]
+    times = [f"{9 + hour:02d}:00" for hour in range(slots_per_day)]
+
+    for number in range(doctor_count):
+        doctor = hospital.Doctor(f"doc{number}", "password", "contact",
+                                 f"Doctor {number}", f"Specialty {number % specialties}")
+        doctor.slots = [(day, time) for day in dates for time in times]
+        hospital.add_doctor(doctor)
+    for number in range(request_count):
+        hospital.patients[f"pat{number}"] = hospital.Patient(f"pat{number}", "password", "contact")
+
+    random.seed(1)
+    requests = [{
+        "patient_id": f"pat{number}",
+        "specialty": f"Specialty {random.randrange(specialties)}",
+        "earliest_date": random.choice(dates),
+        "priority": random.randint(1, 5)
+    } for number in range(request_count)]
+
+    begin = time.perf_counter()
+    booked, unplaced = hospital.schedule_batch(requests)
+    elapsed = time.perf_counter() - begin
+    hospital.store.close()
+    print(f"{request_count} requests against {doctor_count} doctors "
+          f"({doctor_count * days * slots_per_day} slots): {len(booked)} booked, "
+          f"{len(unplaced)} unplaced in {elapsed:.2f} s")
+
+
+def bench_sessions(users=20, logins=50, verifications=1000000):
+    """Compare password logins with session token checks in hospital.py."""
+    import hospital
+
+    for number in range(users):
+        hospital.patients[f"user{number}"] = hospital.Patient(f"user{number}", f"secret{number}", "contact")
+
+    begin = time.perf_counter()
+    tokens = [hospital.sessions.login(f"user{number % users}", f"secret{number % users}")
+              for number in range(logins)]
+    login_rate = logins / (time.perf_counter() - begin)
+
+    begin = time.perf_counter()
+    for number in range(verifications):
+        hospital.sessions.verify(tokens[number % logins])
+    verify_rate = verifications / (time.perf_counter() - begin)
+
+    print(f"PBKDF2-SHA256 with {hospital.PASSWORD_ITERATIONS} iterations")
+    print(f"Logins (password hash): {login_rate:,.0f} per second")
+    print(f"Session verifications:  {verify_rate:,.0f} per second")
+
+
+def bench_project1_booking(patient_count=1000000, doctor_count=1000, bookings=100000):
+    """Time project_1.Hospital.book_appointment with a large patient list."""
+    import contextlib
+
+    import project_1
+
+    hospital = project_1.Hospital()
+    with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+        for number in range(patient_count):
+            hospital.add_patient(project_1.Patient(str(number), "Patient", "female", "30"))
+        for number in range(doctor_count):
+            hospital.add_doctor(project_1.Doctor(str(number), "Doctor", "General", "Mon-Fri"))
+
+        begin = time.perf_counter()
+        for number in range(bookings):
+            hospital.book_appointment(project_1.Appointment(
+                str(number), str(number * 7919 % patient_count), str(number % doctor_count),
+                "2030-01-01", "10:00"))
+        elapsed = time.perf_counter() - begin
+
+    print(f"{bookings} bookings with {patient_count} patients and {doctor_count} doctors "
+          f"in {elapsed:.2f} s: {bookings / elapsed:,.0f} bookings per second")
+
+
+def bench_project1_parallel_load(records=1000000):
+    """Compare sequential, threaded and multi-process project_1 loading."""
+    import tempfile
+
+    import project_1
+
+    folder = tempfile.mkdtemp()
+    files = [os.path.join(folder, name) for name in ("patients.json", "doctors.json", "appointments.json")]
+    rows = [
+        lambda number: {"patient_id": str(number), "name": f"Patient {number}", "gender": "female", "age": "30"},
+        lambda number: {"doctor_id": str(number), "name": f"Doctor {number}", "specialization": "General",
+                        "available_days": "Mon-Fri 09:00-17:00"},
+        lambda number: {"appointment_id": str(number), "patient_id": str(number), "doctor_id": str(number % 1000),
+                        "date": "2030-01-01", "time": "10:00"},
+    ]
+    for path, row in zip(files, rows):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump([row(number) for number in range(records)], file, indent=4)
+    size = sum(os.path.getsize(path) for path in files) / 1e6
+    print(f"Loading 3 x {records} records ({size:.0f} MB)")
+
+    for mode in (None, "thread", "process"):
+        hospital = project_1.Hospital()
+        begin = time.perf_counter()
+        hospital.load_from_json(*files, parallel=mode)
+        print(f"  {mode or 'sequential'}: {time.perf_counter() - begin:.2f} s")
+
+
+class _PlainProject1Appointment:
+    """project_1.Appointment before it had __slots__ and FIELDS, for comparison."""
+
+    def __init__(self, appointment_id, patient_id, doctor_id, date, time):
+        self.appointment_id = appointment_id
+        self.patient_id = patient_id
+        self.doctor_id = doctor_id
+        self.date = date
+        self.time = time
+
+
+def _project1_fixture(rows, patient_count=100000, doctor_count=1000):
+    """Build a project_1 Hospital with patients and doctors, plus an appointments CSV for them.
+
+    Returns (hospital, CSV path). Works inside a temporary folder so the ID
+    state file stays out of the working tree.
+    """
+    import contextlib
+    import csv
+    import tempfile
+
+    import project_1
+
+    folder = tempfile.mkdtemp()
+    path = os.path.join(folder, "appointments.csv")
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(("appointment_id", "patient_id", "doctor_id", "date", "time"))
+        writer.writerows((f"A{number}", str(number % patient_count), str(number % doctor_count),
+                          f"2030-01-{number % 28 + 1:02d}", f"{9 + number % 8:02d}:00")
+                         for number in range(rows))
+
+    os.chdir(folder)
+    hospital = project_1.Hospital()
+    with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+        for number in range(patient_count):
+            hospital.add_patient(project_1.Patient(str(number), "Patient", "female", "30"))
+        for number in range(doctor_count):
+            hospital.add_doctor(project_1.Doctor(str(number), "Doctor", "General", "Mon-Fri"))
+    return hospital, path
+
+
+def bench_project1_csv(rows=1000000):
+    """Time project_1 CSV import and export of a large appointments extract."""
+    hospital, path = _project1_fixture(rows)
+
+    begin = time.perf_counter()
+    imported, errors = hospital.import_csv("appointments", path)
+    elapsed = time.perf_counter() - begin
+    print(f"Imported {imported} appointments ({len(errors)} errors) in {elapsed:.2f} s: "
+          f"{imported / elapsed:,.0f} rows per second")
+
+    begin = time.perf_counter()
+    exported = hospital.export_csv("appointments", os.path.join(os.path.dirname(path), "export.csv"))
+    elapsed = time.perf_counter() - begin
+    print(f"Exported {exported} appointments in {elapsed:.2f} s: {exported / elapsed:,.0f} rows per second")
+
+
+def bench_project1_day_sheet(rows=1000000, queries=10000):
+    """Time project_1 day-sheet and patient-history queries against a full scan."""
+    hospital, path = _project1_fixture(rows)
+    hospital.import_csv("appointments", path)
+
+    begin = time.perf_counter()
+    hospital.rebuild_indexes("appointments")
+    print(f"Index rebuild for {rows} appointments: {time.perf_counter() - begin:.2f} s")
+
+    begin = time.perf_counter()
+    for number in range(queries):
+        hospital.day_sheet(str(number % 1000), f"2030-01-{number % 28 + 1:02d}")
+    indexed = (time.perf_counter() - begin) / queries
+    begin = time.perf_counter()
+    for number in range(queries):
+        hospital.patient_appointments(str(number % 100000))
+    history = (time.perf_counter() - begin) / queries
+    begin = time.perf_counter()
+    day = sorted((appointment for appointment in hospital.appointments.values()
+                  if appointment.doctor_id == "0" and appointment.date == "2030-01-01"),
+                 key=lambda appointment: appointment.time)
+    scan = time.perf_counter() - begin
+    print(f"Day sheet: {indexed * 1e6:.1f} us indexed vs {scan * 1e3:.0f} ms scanning "
+          f"({len(day)} appointments); patient history: {history * 1e6:.1f} us")
+
+
+def bench_project1_validate(rows=1000000, removed_patients=1000):
+    """Time the project_1 referential-integrity check against a per-appointment scan."""
+    hospital, path = _project1_fixture(rows)
+    hospital.import_csv("appointments", path)
+    for number in range(removed_patients):
+        del hospital.patients[str(number * 97)]
+
+    begin = time.perf_counter()
+    report = hospital.validate()
+    indexed = time.perf_counter() - begin
+    begin = time.perf_counter()
+    scanned = [appointment.appointment_id for appointment in hospital.appointments.values()
+               if appointment.patient_id not in hospital.patients or appointment.doctor_id not in hospital.doctors]
+    scan = time.perf_counter() - begin
+    assert len(scanned) == len(report["orphans"])
+    print(f"{len(report['orphans'])} orphans among {rows} appointments: "
+          f"{indexed * 1e3:.1f} ms from the indexes vs {scan * 1e3:.0f} ms scanning")
+
+
+def bench_project1_doctor_load(rows=1000000):
+    """Time the project_1 per-doctor load report over a large appointment set."""
+    hospital, path = _project1_fixture(rows)
+    hospital.import_csv("appointments", path)
+
+    for period in ("day", "week"):
+        begin = time.perf_counter()
+        report, peak_hours = hospital.doctor_load(period)
+        elapsed = time.perf_counter() - begin
+        print(f"Per-{period} load for {rows} appointments: {len(report)} rows in {elapsed:.2f} s, "
+              f"peak hour {peak_hours.most_common(1)[0][0]}:00")
+
+
+def bench_project1_serializers(records=1000000):
+    """Round-trip project_1 appointments through the __dict__ JSON path and the compact formats."""
+    import gc
+    import tempfile
+
+    import project_1
+
+    folder = tempfile.mkdtemp()
+    rows = [(f"A{number}", str(number % 100000), str(number % 1000),
+             f"2030-01-{number % 28 + 1:02d}", f"{9 + number % 8:02d}:00") for number in range(records)]
+
+    def write_dicts(file, appointments):
+        json.dump([appointment.__dict__ for appointment in appointments], file, indent=4)
+
+    def read_dicts(path):
+        return [_PlainProject1Appointment(**data) for data in project_1.iter_json_records(path)]
+
+    def read_records(path):
+        return list(project_1.load_records(path, project_1.Appointment, "appointment_id")[0].values())
+
+    formats = [
+        ("__dict__ JSON", "dicts.json", _PlainProject1Appointment, write_dicts, read_dicts, False),
+        ("compact JSON", "rows.json", project_1.Appointment,
+         lambda file, appointments: project_1.write_compact_json(file, project_1.Appointment, appointments),
+         read_records, False),
+        ("binary", "rows.bin", project_1.Appointment,
+         lambda file, appointments: project_1.write_binary(file, project_1.Appointment, appointments),
+         read_records, True),
+    ]
+    sample = [json.dumps(row) for row in rows[:10000]]
+    for label, name, record_class, write, read, binary in formats:
+        path = os.path.join(folder, name)
+        appointments = [record_class(*row) for row in rows]
+        gc.collect()
+        begin = time.perf_counter()
+        project_1.write_atomic(path, lambda file: write(file, appointments), binary=binary)
+        written = time.perf_counter() - begin
+        del appointments
+        gc.collect()
+        begin = time.perf_counter()
+        loaded = read(path)
+        elapsed = time.perf_counter() - begin
+        assert len(loaded) == records
+        print(f"{label:>14}: save {records / written:>9,.0f}/s, load {records / elapsed:>9,.0f}/s, "
+              f"{os.path.getsize(path) / records:.0f} bytes per record, "
+              f"{_bytes_per_record(lambda row: record_class(*row), sample):.0f} bytes per object")
+
+
+BENCHMARKS = {
+    "school_startup": bench_school_startup,
+    "specialty_search": bench_specialty_search,
+    "hospital_memory": bench_hospital_memory,
+    "batch_scheduler": bench_batch_scheduler,
+    "sessions": bench_sessions,
+    "project1_booking": bench_project1_booking,
+    "project1_parallel_load": bench_project1_parallel_load,
+    "project1_csv": bench_project1_csv,
+    "project1_day_sheet": bench_project1_day_sheet,
+    "project1_validate": bench_project1_validate,
+    "project1_doctor_load": bench_project1_doctor_load,
+    "project1_serializers": bench_project1_serializers,
+}
+
+
+def main():
+    """Run the benchmark named on the command line."""
+    if len(sys.argv) < 2 or sys.argv[1] not in BENCHMARKS:
+        print("Usage: python benchmarks.py <benchmark>")
+        print("Available benchmarks: " + ", ".join(BENCHMARKS))
+        return
+    BENCHMARKS[sys.argv[1]]()
+
+
+if __name__ == "__main__":
+    main()
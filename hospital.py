@@ -1,11 +1,67 @@
+import csv
+import hashlib
+import heapq
+import hmac
+import json
+import os
+import secrets
+import sys
+import time as clock
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from collections import OrderedDict, namedtuple
+from itertools import count, islice, repeat
+from urllib.parse import quote
+
+HISTORY_DIR = "medical_history"  # One folder per patient, one .jsonl segment per month
+PASSWORD_ITERATIONS = 200000  # PBKDF2 rounds; deliberately slow to resist guessing
+
+
+def hash_password(password, salt=None, iterations=None):
+    """
+    Hash a password with salted PBKDF2-SHA256.
+    :return: A string of the form "pbkdf2_sha256$<iterations>$<salt>$<hash>".
+    """
+    salt = salt or secrets.token_hex(16)
+    iterations = iterations or PASSWORD_ITERATIONS
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt.encode("utf-8"), iterations)
+    return f"pbkdf2_sha256${iterations}${salt}${digest.hex()}"
+
+
+def check_password(password, password_hash):
+    """Check a password against a hash made by hash_password."""
+    try:
+        _, iterations, salt, _ = password_hash.split("$")
+        iterations = int(iterations)
+    except (AttributeError, ValueError):
+        return False
+    if iterations < 1:
+        return False
+    return hmac.compare_digest(hash_password(password, salt, iterations), password_hash)
+
+
+def _date_bounds(slots, start_date, end_date):
+    """
+    Return the index range of (date, time) slots whose date falls between
+    start_date and end_date (inclusive). Dates are "YYYY-MM-DD" strings,
+    so they sort correctly as text.
+    """
+    low = bisect_left(slots, (start_date,))
+    high = bisect_left(slots, (end_date + "\0",))
+    return low, high
+
+
 class User:
+    __slots__ = ("username", "password_hash", "contact_info")
+
     def __init__(self, username, password, contact_info):
         """
         Initialize a user with a username, password, and contact information.
-        Passwords should ideally be hashed for security.
+        Only a salted hash of the password is kept. Pass password=None when
+        the hash is set afterwards (e.g. when loading a saved record).
         """
-        self.username = username
-        self.password = password  # In a real system, store hashed passwords
+        self.username = sys.intern(username)
+        self.password_hash = hash_password(password) if password is not None else None
         self.contact_info = contact_info
 
     def update_contact_info(self, new_contact_info):
@@ -22,12 +78,14 @@ class User:
     def authenticate(self, password):
         """
         Check if the provided password matches the user's password.
-        This would typically involve hashing and comparing in a real system.
+        This is deliberately slow; use SessionStore to avoid doing it on every request.
         """
-        return self.password == password
+        return check_password(password, self.password_hash)
     
 
 class Doctor(User):
+    __slots__ = ("name", "specialty", "slots")
+
     def __init__(self, username, password, contact_info, name, specialty):
         """
         Initialize a doctor with additional attributes for their name and specialty.
@@ -35,26 +93,79 @@ class Doctor(User):
         """
         super().__init__(username, password, contact_info)
         self.name = name
-        self.specialty = specialty
-        self.availability = {}  # Dictionary to track available time slots (e.g., {"2025-01-15": ["10:00", "11:00"]})
+        self.specialty = sys.intern(specialty)
+        self.slots = []  # Sorted, de-duplicated (date, time) tuples, e.g. [("2025-01-15", "10:00")]
+
+    @property
+    def availability(self):
+        """
+        Available time slots grouped by date, in date and time order.
+        Example: {"2025-01-15": ["10:00", "11:00"]}
+        """
+        grouped = {}
+        for date, time in self.slots:
+            grouped.setdefault(date, []).append(time)
+        return grouped
 
     def add_availability(self, date, time_slots):
         """
         Add available time slots for a specific date.
+        Slots that are already available are ignored.
         :param date: A string representing the date (e.g., "2025-01-15").
         :param time_slots: A list of time slots (e.g., ["10:00", "11:00"]).
         """
-        if date in self.availability:
-            self.availability[date].extend(time_slots)
-        else:
-            self.availability[date] = time_slots
+        for time in time_slots:
+            slot = (date, time)
+            index = bisect_left(self.slots, slot)
+            if index == len(self.slots) or self.slots[index] != slot:
+                self.slots.insert(index, slot)
 
     def update_availability(self, date, new_time_slots):
         """
         Update the availability for a specific date.
         Replaces the existing time slots for the given date.
         """
-        self.availability[date] = new_time_slots
+        low, high = _date_bounds(self.slots, date, date)
+        self.slots[low:high] = sorted({(date, time) for time in new_time_slots})
+
+    def remove_slot(self, date, time):
+        """
+        Remove a time slot, e.g. once an appointment has been booked in it.
+        :return: True if the slot was available and has been removed.
+        """
+        index = bisect_left(self.slots, (date, time))
+        if index < len(self.slots) and self.slots[index] == (date, time):
+            del self.slots[index]
+            return True
+        return False
+
+    def is_available(self, date, time):
+        """Check whether a specific time slot is available."""
+        index = bisect_left(self.slots, (date, time))
+        return index < len(self.slots) and self.slots[index] == (date, time)
+
+    def next_available_slot(self, date=None, time=None):
+        """
+        Return the first available (date, time) slot at or after the given
+        date and time (defaults to now), or None if there is none.
+        """
+        if date is None:
+            now = datetime.now()
+            date, time = now.strftime("%Y-%m-%d"), now.strftime("%H:%M")
+        index = bisect_left(self.slots, (date, time or ""))
+        if index < len(self.slots):
+            return self.slots[index]
+        return None
+
+    def slots_between(self, start_date, end_date):
+        """Return the available (date, time) slots from start_date to end_date (inclusive)."""
+        low, high = _date_bounds(self.slots, start_date, end_date)
+        return self.slots[low:high]
+
+    def iter_slots(self, start_date, end_date):
+        """Yield the available (date, time) slots from start_date to end_date (inclusive), one at a time."""
+        low, high = _date_bounds(self.slots, start_date, end_date)
+        return map(self.slots.__getitem__, range(low, high))
 
     def view_schedule(self):
         """Return the doctor's schedule, including all available time slots."""
@@ -64,20 +175,117 @@ class Doctor(User):
             "Availability": self.availability
         }
 
+    def view_details(self):
+        """Return the doctor's details, including their schedule."""
+        details = self.view_profile()
+        details.update(self.view_schedule())
+        return details
+
+    def to_dict(self):
+        """Return a dictionary representation of the doctor."""
+        return {
+            "username": self.username,
+            "password_hash": self.password_hash,
+            "contact_info": self.contact_info,
+            "name": self.name,
+            "specialty": self.specialty,
+            "availability": self.availability
+        }
+
+    @staticmethod
+    def from_dict(data):
+        """Create a Doctor object from a dictionary."""
+        doctor = Doctor(
+            username=data["username"],
+            password=data.get("password"),  # Only older records have a plain password
+            contact_info=data["contact_info"],
+            name=data["name"],
+            specialty=data["specialty"]
+        )
+        if data.get("password_hash"):
+            doctor.password_hash = data["password_hash"]
+        for date, time_slots in data.get("availability", {}).items():
+            doctor.add_availability(date, time_slots)
+        return doctor
+
 class Patient(User):
     """
     Represents a patient, inheriting common attributes from the User class.
     Adds attributes for medical history and patient-specific methods.
+
+    Medical history is not kept with the patient record. Each entry is
+    appended to a per-month segment file under HISTORY_DIR and only read
+    back when the history is asked for.
     """
+    __slots__ = ("name", "age", "_history")
+
     def __init__(self, username, password, contact_info, name=None, age=None):
         super().__init__(username, password, contact_info)
         self.name = name
         self.age = age
-        self.medical_history = []
+        self._history = None  # Loaded on first use
 
-    def add_medical_history(self, entry):
-        """Add a new entry to the patient's medical history."""
-        self.medical_history.append(entry)
+    def history_dir(self):
+        """Return the folder holding this patient's history segments."""
+        return os.path.join(HISTORY_DIR, quote(self.username, safe=""))
+
+    def add_medical_history(self, entry, date=None):
+        """
+        Add a new entry to the patient's medical history.
+        :param entry: Description of the visit, diagnosis, etc.
+        :param date: Date of the entry (e.g., "2025-01-15"), defaults to today.
+               Use "" for entries with no known date.
+        """
+        if date is None:
+            date = datetime.now().strftime("%Y-%m-%d")
+        record = {"date": date, "entry": entry}
+        os.makedirs(self.history_dir(), exist_ok=True)
+        segment = os.path.join(self.history_dir(), (record["date"][:7] or "undated") + ".jsonl")
+        with open(segment, "a", encoding="utf-8") as file:
+            file.write(json.dumps(record) + "\n")
+        if self._history is not None:
+            insort(self._history, record, key=lambda item: item["date"])
+
+    def iter_medical_history(self, start_date=None, end_date=None):
+        """
+        Yield history entries ({"date": ..., "entry": ...}) in date order,
+        optionally limited to start_date..end_date (inclusive). Only the
+        monthly segments overlapping the range are read.
+        """
+        try:
+            segments = os.listdir(self.history_dir())
+        except FileNotFoundError:
+            return
+        months = sorted("" if name == "undated.jsonl" else name[:-len(".jsonl")]
+                        for name in segments if name.endswith(".jsonl"))
+
+        for month in months:
+            if start_date and month < start_date[:7]:
+                continue
+            if end_date and month > end_date[:7]:
+                break
+            with open(os.path.join(self.history_dir(), (month or "undated") + ".jsonl"),
+                      "r", encoding="utf-8") as file:
+                records = [json.loads(line) for line in file if line.strip()]
+            records.sort(key=lambda item: item["date"])
+            for record in records:
+                if start_date and record["date"] < start_date:
+                    continue
+                if end_date and record["date"] > end_date:
+                    break
+                yield record
+
+    def medical_history_page(self, start_date=None, end_date=None, page=1, page_size=20):
+        """Return one page (1-based) of history entries within the date range."""
+        start = (page - 1) * page_size
+        return list(islice(self.iter_medical_history(start_date, end_date), start, start + page_size))
+
+    @property
+    def medical_history(self):
+        """The patient's full medical history, read from disk on first use."""
+        if self._history is None:
+            self._history = list(self.iter_medical_history())
+        return self._history
 
     def view_details(self):
         """Return the patient's details, including medical history."""
@@ -93,11 +301,10 @@ class Patient(User):
         """Return a dictionary representation of the patient."""
         return {
             "username": self.username,
-            "password": self.password,  # Store only if hashed
+            "password_hash": self.password_hash,
             "contact_info": self.contact_info,
             "name": self.name,
-            "age": self.age,
-            "medical_history": self.medical_history
+            "age": self.age
         }
 
     @staticmethod
@@ -105,43 +312,153 @@ class Patient(User):
         """Create a Patient object from a dictionary."""
         patient = Patient(
             username=data["username"],
-            password=data["password"],  # Ensure secure handling of passwords
+            password=data.get("password"),  # Only older records have a plain password
             contact_info=data["contact_info"],
             name=data.get("name"),
             age=data.get("age")
         )
-        patient.medical_history = data.get("medical_history", [])
+        if data.get("password_hash"):
+            patient.password_hash = data["password_hash"]
+        # Older records carried the history inline, move it to the segment store once
+        if data.get("medical_history") and not os.path.isdir(patient.history_dir()):
+            for entry in data["medical_history"]:
+                if isinstance(entry, dict):
+                    patient.add_medical_history(entry["entry"], entry.get("date", ""))
+                else:
+                    patient.add_medical_history(entry, "")
         return patient
     
 
+class BookingIndex:
+    """
+    Tracks which (doctor, date, time) and (patient, date, time) slots are
+    taken, so booking conflicts are found with a dictionary lookup no matter
+    how many appointments exist.
+    """
+    def __init__(self, doctors):
+        """
+        :param doctors: Mapping of doctor ID to Doctor, used to take booked
+               slots out of (and put freed slots back into) their availability.
+        """
+        self.doctors = doctors
+        self.doctor_slots = {}  # (doctor_id, date, time) -> appointment_id
+        self.patient_slots = {}  # (patient_id, date, time) -> appointment_id
+        self.from_availability = set()  # IDs of appointments booked into a published slot
+
+    def clear(self):
+        """Forget all bookings."""
+        self.doctor_slots.clear()
+        self.patient_slots.clear()
+        self.from_availability.clear()
+
+    def conflict(self, doctor_id, patient_id, date, time, appointment_id=None):
+        """
+        Return a message describing why the slot cannot be booked,
+        or None if both the doctor and the patient are free.
+        """
+        taken = self.doctor_slots.get((doctor_id, date, time))
+        if taken is not None and taken != appointment_id:
+            return f"Doctor {doctor_id} already has appointment {taken} on {date} at {time}"
+        taken = self.patient_slots.get((patient_id, date, time))
+        if taken is not None and taken != appointment_id:
+            return f"Patient {patient_id} already has appointment {taken} on {date} at {time}"
+        return None
+
+    def book(self, appointment):
+        """
+        Mark the appointment's slot as taken.
+        :raises ValueError: If the doctor or patient is already booked at that time.
+        """
+        message = self.conflict(appointment.doctor_id, appointment.patient_id,
+                                appointment.date, appointment.time, appointment.appointment_id)
+        if message:
+            raise ValueError(message)
+
+        self.doctor_slots[(appointment.doctor_id, appointment.date, appointment.time)] = appointment.appointment_id
+        self.patient_slots[(appointment.patient_id, appointment.date, appointment.time)] = appointment.appointment_id
+        doctor = self.doctors.get(appointment.doctor_id)
+        if doctor and doctor.remove_slot(appointment.date, appointment.time):
+            self.from_availability.add(appointment.appointment_id)
+
+    def add_availability(self, doctor, date, time_slots):
+        """
+        Add available slots for a doctor, leaving out those already booked.
+        A booked slot goes back into availability if its appointment is cancelled.
+        """
+        free = []
+        for time in time_slots:
+            taken = self.doctor_slots.get((doctor.username, date, time))
+            if taken is None:
+                free.append(time)
+            else:
+                self.from_availability.add(taken)
+        doctor.add_availability(date, free)
+
+    def update_availability(self, doctor, date, new_time_slots):
+        """Replace a doctor's slots for a date, leaving out those already booked."""
+        free = [time for time in new_time_slots if (doctor.username, date, time) not in self.doctor_slots]
+        doctor.update_availability(date, free)
+
+    def release(self, appointment):
+        """Free the appointment's slot, returning it to the doctor's availability if it came from there."""
+        doctor_key = (appointment.doctor_id, appointment.date, appointment.time)
+        patient_key = (appointment.patient_id, appointment.date, appointment.time)
+        if self.doctor_slots.get(doctor_key) == appointment.appointment_id:
+            del self.doctor_slots[doctor_key]
+        if self.patient_slots.get(patient_key) == appointment.appointment_id:
+            del self.patient_slots[patient_key]
+        if appointment.appointment_id in self.from_availability:
+            self.from_availability.discard(appointment.appointment_id)
+            doctor = self.doctors.get(appointment.doctor_id)
+            if doctor:
+                doctor.add_availability(appointment.date, [appointment.time])
+
+
 class Appointment:
     """
     Represents an appointment between a doctor and a patient.
     """
+    __slots__ = ("appointment_id", "doctor_id", "patient_id", "date", "time", "reason", "status")
+
     def __init__(self, appointment_id, doctor_id, patient_id, date, time, reason):
         """
         Initialize an appointment with doctor and patient references, date, time, and reason.
+        IDs, dates and times repeat across many appointments, so they are interned
+        to share one string object each.
         """
         self.appointment_id = appointment_id
-        self.doctor_id = doctor_id  # Reference to the doctor's ID or object
-        self.patient_id = patient_id  # Reference to the patient's ID or object
-        self.date = date
-        self.time = time
+        self.doctor_id = sys.intern(doctor_id)  # Reference to the doctor's ID
+        self.patient_id = sys.intern(patient_id)  # Reference to the patient's ID
+        self.date = sys.intern(date)
+        self.time = sys.intern(time)
         self.reason = reason
         self.status = "Scheduled"  # Possible values: Scheduled, Rescheduled, Canceled
 
     def reschedule(self, new_date, new_time):
         """
         Reschedule the appointment to a new date and time.
+        :raises ValueError: If the appointment was canceled, or the doctor or
+            patient is already booked at the new time.
         """
-        self.date = new_date
-        self.time = new_time
+        if self.status == "Canceled":
+            raise ValueError("The appointment was canceled, schedule a new one instead")
+        message = booking_index.conflict(self.doctor_id, self.patient_id,
+                                         new_date, new_time, self.appointment_id)
+        if message:
+            raise ValueError(message)
+
+        booking_index.release(self)
+        self.date = sys.intern(new_date)
+        self.time = sys.intern(new_time)
+        booking_index.book(self)
         self.status = "Rescheduled"
 
     def cancel(self):
         """
-        Cancel the appointment.
+        Cancel the appointment and free its time slot.
         """
+        if self.status != "Canceled":
+            booking_index.release(self)
         self.status = "Canceled"
 
     def view_details(self):
@@ -177,7 +494,7 @@ class Appointment:
         """
         Create an Appointment object from a dictionary.
         """
-        return Appointment(
+        appointment = Appointment(
             appointment_id=data["appointment_id"],
             doctor_id=data["doctor_id"],
             patient_id=data["patient_id"],
@@ -185,11 +502,20 @@ class Appointment:
             time=data["time"],
             reason=data["reason"]
         )
+        appointment.status = sys.intern(data.get("status", "Scheduled"))
+        return appointment
+
+Medication = namedtuple("Medication", ["name", "dosage", "instructions"])
+
 
 class Prescription:
     """
     Represents a prescription issued by a doctor for a patient.
+    Medications are kept as compact Medication tuples and returned as
+    dictionaries by the `medications` property.
     """
+    __slots__ = ("prescription_id", "doctor_id", "patient_id", "date", "medication_entries")
+
     def __init__(self, prescription_id, doctor_id, patient_id, date, medications):
         """
         Initialize a prescription with a unique ID, doctor and patient references, date, and medications.
@@ -201,10 +527,18 @@ class Prescription:
                Example: [{"name": "Paracetamol", "dosage": "500mg", "instructions": "Take one tablet every 8 hours"}]
         """
         self.prescription_id = prescription_id
-        self.doctor_id = doctor_id
-        self.patient_id = patient_id
-        self.date = date
-        self.medications = medications  # List of medication dictionaries
+        self.doctor_id = sys.intern(doctor_id)
+        self.patient_id = sys.intern(patient_id)
+        self.date = sys.intern(date)
+        self.medication_entries = [
+            Medication(sys.intern(medication["name"]), sys.intern(medication["dosage"]), medication["instructions"])
+            for medication in medications
+        ]
+
+    @property
+    def medications(self):
+        """List of medication dictionaries, e.g. [{"name": ..., "dosage": ..., "instructions": ...}]."""
+        return [medication._asdict() for medication in self.medication_entries]
 
     def add_medication(self, name, dosage, instructions):
         """
@@ -213,11 +547,9 @@ class Prescription:
         :param dosage: Dosage of the medication (e.g., "500mg").
         :param instructions: Usage instructions (e.g., "Take one tablet every 8 hours").
         """
-        self.medications.append({
-            "name": name,
-            "dosage": dosage,
-            "instructions": instructions
-        })
+        self.medication_entries.append(Medication(sys.intern(name), sys.intern(dosage), instructions))
+        if prescriptions.get(self.prescription_id) is self:
+            medication_index.add(self, name)
 
     def view_details(self):
         """
@@ -257,6 +589,251 @@ class Prescription:
         )
 
 
+def normalize_medication(name):
+    """Normalize a medication name for lookups (e.g. " Paracetamol  500 " -> "paracetamol 500")."""
+    return " ".join(name.lower().split())
+
+
+class MedicationIndex:
+    """
+    Maps normalized medication names to the prescriptions that include them,
+    so a drug recall can find every affected patient without scanning all
+    prescriptions. Names are also kept sorted for prefix lookups.
+    """
+    def __init__(self, prescriptions):
+        """
+        :param prescriptions: Mapping of prescription ID to Prescription.
+        """
+        self.prescriptions = prescriptions
+        self.entries = {}  # Normalized name -> sorted list of (date, prescription_id)
+        self.names = []  # Sorted normalized names
+
+    def clear(self):
+        """Forget all indexed medications."""
+        self.entries.clear()
+        self.names.clear()
+
+    def add(self, prescription, name):
+        """Index one medication of a prescription."""
+        name = normalize_medication(name)
+        entries = self.entries.get(name)
+        if entries is None:
+            entries = self.entries[name] = []
+            insort(self.names, name)
+        entry = (prescription.date, prescription.prescription_id)
+        index = bisect_left(entries, entry)
+        if index == len(entries) or entries[index] != entry:
+            entries.insert(index, entry)
+
+    def add_prescription(self, prescription):
+        """Index every medication of a prescription."""
+        for medication in prescription.medication_entries:
+            self.add(prescription, medication.name)
+
+    def rebuild(self):
+        """Index every stored prescription, sorting each name's entries once instead of per insert."""
+        self.clear()
+        entries = self.entries
+        for prescription in self.prescriptions.values():
+            entry = (prescription.date, prescription.prescription_id)
+            for medication in prescription.medication_entries:
+                entries.setdefault(normalize_medication(medication.name), []).append(entry)
+        for name, name_entries in entries.items():
+            entries[name] = sorted(set(name_entries))
+        self.names.extend(sorted(entries))
+
+    def matching_names(self, name, prefix=False):
+        """Return the indexed names equal to (or starting with, if prefix is True) the given name."""
+        name = normalize_medication(name)
+        if not prefix:
+            return [name] if name in self.entries else []
+        index = bisect_left(self.names, name)
+        matches = []
+        while index < len(self.names) and self.names[index].startswith(name):
+            matches.append(self.names[index])
+            index += 1
+        return matches
+
+    def lookup(self, name, prefix=False, start_date=None, end_date=None):
+        """
+        Yield (prescription, medication_name) for every prescription that
+        includes the medication, optionally limited to prescriptions dated
+        start_date..end_date (inclusive). Entries are sorted by date, so the
+        range is found by bisection instead of checking every prescription.
+        """
+        for match in self.matching_names(name, prefix):
+            entries = self.entries[match]
+            low = bisect_left(entries, (start_date,)) if start_date else 0
+            high = bisect_left(entries, (end_date + "\0",)) if end_date else len(entries)
+            for index in range(low, high):
+                yield self.prescriptions[entries[index][1]], match
+
+
+class HospitalStore:
+    """
+    Saves the hospital records as a compact snapshot plus an append-only log.
+
+    Every change is applied through record(), which appends one JSON line to
+    the log, so saving costs the same no matter how many records exist. The
+    log is folded into a new snapshot once it holds `snapshot_every` changes
+    or half as many changes as the snapshot has records, whichever is more,
+    and on exit. On start, load() reads the snapshot and replays the log.
+    """
+    def __init__(self, snapshot_file="hospital_snapshot.json", log_file="hospital_log.jsonl",
+                 snapshot_every=1000):
+        self.snapshot_file = snapshot_file
+        self.log_file = log_file
+        self.snapshot_every = snapshot_every
+        self.sequence = 0  # Sequence number of the last change applied
+        self.pending = 0  # Changes logged since the last snapshot
+        self.snapshot_size = 0  # Records in the last snapshot
+        self._log = None
+
+    def load(self):
+        """Load the latest snapshot, then replay the log written after it."""
+        snapshot_sequence = 0
+        try:
+            with open(self.snapshot_file, "r", encoding="utf-8") as file:
+                snapshot = json.load(file)
+            snapshot_sequence = snapshot.get("sequence", 0)
+            load_snapshot(snapshot)
+        except FileNotFoundError:
+            pass
+        self.sequence = snapshot_sequence
+        self.snapshot_size = record_count()
+
+        try:
+            with open(self.log_file, "rb") as file:
+                log_data = file.read()
+        except FileNotFoundError:
+            log_data = b""
+
+        offset = 0
+        while offset < len(log_data):
+            end = log_data.find(b"\n", offset)
+            line_end = len(log_data) if end == -1 else end + 1
+            try:
+                change = json.loads(log_data[offset:line_end])
+            except ValueError:
+                if log_data[line_end:].strip():
+                    raise ValueError(f"{self.log_file} is corrupted at byte {offset}")
+                # A crash while appending leaves a partial last line, drop it
+                print(f"Warning: Discarding incomplete last entry in {self.log_file}")
+                with open(self.log_file, "r+b") as file:
+                    file.truncate(offset)
+                break
+            if end == -1:
+                # Complete entry without its newline, finish the line before appending
+                with open(self.log_file, "ab") as file:
+                    file.write(b"\n")
+            offset = line_end
+
+            if change["seq"] <= snapshot_sequence:
+                continue
+            try:
+                apply_change(change["op"], change["data"])
+            except (KeyError, ValueError) as e:
+                print(f"Warning: Could not replay change {change['seq']}: {e}")
+            self.sequence = change["seq"]
+            self.pending += 1
+
+    def record(self, op, data):
+        """
+        Apply a change and append it to the log.
+        :raises ValueError: If the change is rejected (e.g. a booking conflict).
+        """
+        apply_change(op, data)
+        if self._log is None:
+            self._log = open(self.log_file, "a", encoding="utf-8")
+        self.sequence += 1
+        self._log.write(json.dumps({"seq": self.sequence, "op": op, "data": data}, separators=(",", ":")) + "\n")
+        self._log.flush()
+
+        self.pending += 1
+        # Growing the threshold with the data keeps snapshot cost per change constant
+        if self.pending >= max(self.snapshot_every, self.snapshot_size // 2):
+            self.snapshot()
+
+    def snapshot(self):
+        """Write all records to a new snapshot file and start an empty log."""
+        snapshot = dump_snapshot()
+        snapshot["sequence"] = self.sequence
+        temp_file = self.snapshot_file + ".tmp"
+        with open(temp_file, "w", encoding="utf-8") as file:
+            json.dump(snapshot, file, separators=(",", ":"))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_file, self.snapshot_file)
+
+        # Entries already in the snapshot are skipped on replay by their
+        # sequence number, so a crash before this truncate is harmless
+        if self._log is not None:
+            self._log.close()
+        self._log = open(self.log_file, "w", encoding="utf-8")
+        self.pending = 0
+        self.snapshot_size = record_count()
+
+    def close(self):
+        """Close the log file."""
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+
+class SessionStore:
+    """
+    Issues session tokens after one slow password check, so later requests
+    only need a dictionary lookup. Sessions expire after `ttl` seconds and at
+    most `max_sessions` are kept; the oldest are dropped first.
+    """
+    def __init__(self, *user_maps, ttl=1800, max_sessions=10000):
+        """
+        :param user_maps: Mappings of username to User to log in against (e.g. patients, doctors).
+        """
+        self.user_maps = user_maps
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        # token -> (username, expiry). Every session lives for the same ttl,
+        # so insertion order is also expiry order.
+        self.sessions = OrderedDict()
+
+    def login(self, username, password):
+        """Check the password and return a new session token, or None if it is wrong."""
+        user = next((users[username] for users in self.user_maps if username in users), None)
+        if user is None or not user.authenticate(password):
+            return None
+
+        now = clock.monotonic()
+        self._evict(now)
+        while len(self.sessions) >= self.max_sessions:
+            self.sessions.popitem(last=False)
+        token = secrets.token_urlsafe(32)
+        self.sessions[token] = (username, now + self.ttl)
+        return token
+
+    def verify(self, token):
+        """Return the username for a valid session token, or None if it is unknown or expired."""
+        session = self.sessions.get(token)
+        if session is None:
+            return None
+        if session[1] <= clock.monotonic():
+            del self.sessions[token]
+            return None
+        return session[0]
+
+    def logout(self, token):
+        """End a session."""
+        self.sessions.pop(token, None)
+
+    def _evict(self, now):
+        """Drop expired sessions from the front of the table."""
+        while self.sessions:
+            token, (_, expiry) = next(iter(self.sessions.items()))
+            if expiry > now:
+                break
+            del self.sessions[token]
+
+
 # Import your classes here, e.g., Patient, Doctor, Appointment, Prescription
 
 # Sample storage for demonstration (in a real application, use file/database storage)
@@ -264,6 +841,178 @@ patients = {}
 doctors = {}
 appointments = {}
 prescriptions = {}
+booking_index = BookingIndex(doctors)
+medication_index = MedicationIndex(prescriptions)
+specialty_index = {}  # Normalized specialty -> set of doctor IDs
+store = HospitalStore()
+sessions = SessionStore(patients, doctors)
+
+def normalize_specialty(specialty):
+    """Normalize a specialty name for lookups (e.g. " Cardiology " -> "cardiology")."""
+    return " ".join(specialty.lower().split())
+
+def add_doctor(doctor):
+    """Store a doctor and index them by specialty."""
+    old_doctor = doctors.get(doctor.username)
+    if old_doctor:
+        specialty_index.get(normalize_specialty(old_doctor.specialty), set()).discard(old_doctor.username)
+    doctors[doctor.username] = doctor
+    specialty_index.setdefault(normalize_specialty(doctor.specialty), set()).add(doctor.username)
+
+def add_prescription(prescription):
+    """Store a prescription and index its medications."""
+    prescriptions[prescription.prescription_id] = prescription
+    medication_index.add_prescription(prescription)
+
+def earliest_slots(specialty, start_date, end_date):
+    """
+    Yield (date, time, doctor_id) for every available slot in a specialty
+    between start_date and end_date (inclusive), earliest first.
+    Each doctor's slots are already sorted, so they are merged lazily and
+    only the slots actually consumed are produced.
+    """
+    streams = [
+        zip(doctors[doctor_id].iter_slots(start_date, end_date), repeat(doctor_id))
+        for doctor_id in specialty_index.get(normalize_specialty(specialty), ())
+    ]
+    return ((date, time, doctor_id) for (date, time), doctor_id in heapq.merge(*streams))
+
+def earliest_slot(specialty, start_date, end_date):
+    """Return the earliest (date, time, doctor_id) slot in a specialty, or None."""
+    return next(earliest_slots(specialty, start_date, end_date), None)
+
+_appointment_numbers = count(1)
+
+def generate_appointment_id():
+    """Return an unused appointment ID of the form APT000001."""
+    while True:
+        appointment_id = f"APT{next(_appointment_numbers):06d}"
+        if appointment_id not in appointments:
+            return appointment_id
+
+def schedule_batch(requests):
+    """
+    Book a batch of referral requests into free doctor slots.
+    :param requests: List of dicts with "patient_id", "specialty", "earliest_date",
+           "priority" (lower number = more urgent) and optionally "reason".
+    :return: (booked, unplaced) where booked is a list of Appointments and
+             unplaced is a list of (request, reason) pairs.
+
+    Requests are placed most urgent first, then by earliest date, each in the
+    first free slot of its specialty on or after its earliest date. Each
+    specialty's free slots are merged into one sorted list once, and a
+    "next free slot" pointer per slot (with path compression) skips slots
+    already taken, so each request costs about one bisect.
+    """
+    booked = []
+    unplaced = []
+    by_specialty = {}
+    for request in requests:
+        if request["patient_id"] not in patients:
+            unplaced.append((request, "Unknown patient"))
+            continue
+        by_specialty.setdefault(normalize_specialty(request["specialty"]), []).append(request)
+
+    for specialty, queue in by_specialty.items():
+        if not specialty_index.get(specialty):
+            unplaced.extend((request, "No doctors for this specialty") for request in queue)
+            continue
+
+        start_date = min(request["earliest_date"] for request in queue)
+        slots = list(earliest_slots(specialty, start_date, "9999-12-31"))
+        next_free = list(range(len(slots) + 1))  # next_free[i] leads to the first untaken slot >= i
+
+        def find_free(index):
+            root = index
+            while next_free[root] != root:
+                root = next_free[root]
+            while next_free[index] != root:
+                next_free[index], index = root, next_free[index]
+            return root
+
+        queue.sort(key=lambda request: (request["priority"], request["earliest_date"]))
+        for request in queue:
+            patient_id = request["patient_id"]
+            index = find_free(bisect_left(slots, (request["earliest_date"],)))
+            # Skip (without using up) slots where the patient or doctor is already booked
+            while index < len(slots) and booking_index.conflict(slots[index][2], patient_id,
+                                                                slots[index][0], slots[index][1]):
+                index = find_free(index + 1)
+            if index == len(slots):
+                unplaced.append((request, "No free slot"))
+                continue
+
+            date, time, doctor_id = slots[index]
+            next_free[index] = index + 1
+            appointment = Appointment(generate_appointment_id(), doctor_id, patient_id,
+                                      date, time, request.get("reason") or "Referral")
+            store.record("appointment", appointment.to_dict())
+            booked.append(appointments[appointment.appointment_id])
+
+    return booked, unplaced
+
+def apply_change(op, data):
+    """
+    Apply one logged change to the in-memory records.
+    :raises ValueError: If the change is rejected (e.g. a booking conflict).
+    """
+    if op == "patient":
+        patients[data["username"]] = Patient.from_dict(data)
+    elif op == "doctor":
+        add_doctor(Doctor.from_dict(data))
+    elif op == "availability":
+        booking_index.add_availability(doctors[data["doctor_id"]], data["date"], data["time_slots"])
+    elif op == "appointment":
+        appointment = Appointment.from_dict(data)
+        booking_index.book(appointment)
+        appointments[appointment.appointment_id] = appointment
+    elif op == "reschedule":
+        appointments[data["appointment_id"]].reschedule(data["date"], data["time"])
+    elif op == "cancel":
+        appointments[data["appointment_id"]].cancel()
+    elif op == "prescription":
+        add_prescription(Prescription.from_dict(data))
+    elif op == "medication":
+        prescriptions[data["prescription_id"]].add_medication(
+            data["name"], data["dosage"], data["instructions"])
+    else:
+        raise ValueError(f"Unknown change type '{op}'")
+
+def record_count():
+    """Return the total number of stored records."""
+    return len(patients) + len(doctors) + len(appointments) + len(prescriptions)
+
+def dump_snapshot():
+    """Return all records as a JSON-ready dictionary."""
+    return {
+        "patients": [patient.to_dict() for patient in patients.values()],
+        "doctors": [doctor.to_dict() for doctor in doctors.values()],
+        "appointments": [appointment.to_dict() for appointment in appointments.values()],
+        "prescriptions": [prescription.to_dict() for prescription in prescriptions.values()],
+        "booked_from_availability": sorted(booking_index.from_availability)
+    }
+
+def load_snapshot(snapshot):
+    """Replace the in-memory records with those from a snapshot."""
+    for records in (patients, doctors, appointments, prescriptions, specialty_index):
+        records.clear()
+    booking_index.clear()
+    medication_index.clear()
+
+    for data in snapshot.get("patients", []):
+        patients[data["username"]] = Patient.from_dict(data)
+    for data in snapshot.get("doctors", []):
+        add_doctor(Doctor.from_dict(data))
+    for data in snapshot.get("appointments", []):
+        appointment = Appointment.from_dict(data)
+        if appointment.status != "Canceled":
+            booking_index.book(appointment)
+        appointments[appointment.appointment_id] = appointment
+    for data in snapshot.get("prescriptions", []):
+        prescription = Prescription.from_dict(data)
+        prescriptions[prescription.prescription_id] = prescription
+    medication_index.rebuild()
+    booking_index.from_availability.update(snapshot.get("booked_from_availability", []))
 
 def create_patient():
     """Create a new patient."""
@@ -273,8 +1022,8 @@ def create_patient():
     name = input("Enter name: ")
     age = input("Enter age: ")
     
-    patient = Patient(username, password, contact_info, name, age)
-    patients[username] = patient
+    # Hash before recording so the plain password never reaches the log
+    store.record("patient", Patient(username, password, contact_info, name, age).to_dict())
     print("Patient created successfully!")
 
 def create_doctor():
@@ -285,8 +1034,7 @@ def create_doctor():
     name = input("Enter name: ")
     specialty = input("Enter specialty: ")
     
-    doctor = Doctor(username, password, contact_info, name, specialty)
-    doctors[username] = doctor
+    store.record("doctor", Doctor(username, password, contact_info, name, specialty).to_dict())
     print("Doctor created successfully!")
 
 def schedule_appointment():
@@ -302,10 +1050,53 @@ def schedule_appointment():
         print("Invalid doctor or patient ID!")
         return
     
+    if appointment_id in appointments:
+        print("Appointment ID already exists!")
+        return
+    
+    date, time = parse_date(date), parse_time(time)
+    if not date or not time:
+        print("Invalid date or time!")
+        return
+    
     appointment = Appointment(appointment_id, doctor_id, patient_id, date, time, reason)
-    appointments[appointment_id] = appointment
+    try:
+        store.record("appointment", appointment.to_dict())
+    except ValueError as e:
+        print(f"Cannot schedule appointment: {e}")
+        return
     print("Appointment scheduled successfully!")
 
+def reschedule_appointment():
+    """Move an appointment to a new date and time."""
+    appointment_id = input("Enter appointment ID: ")
+    if appointment_id not in appointments:
+        print("Invalid appointment ID!")
+        return
+    
+    date = parse_date(input("Enter new date (YYYY-MM-DD): "))
+    time = parse_time(input("Enter new time (HH:MM): "))
+    if not date or not time:
+        print("Invalid date or time!")
+        return
+    
+    try:
+        store.record("reschedule", {"appointment_id": appointment_id, "date": date, "time": time})
+    except ValueError as e:
+        print(f"Cannot reschedule appointment: {e}")
+        return
+    print("Appointment rescheduled successfully!")
+
+def cancel_appointment():
+    """Cancel an appointment."""
+    appointment_id = input("Enter appointment ID: ")
+    if appointment_id not in appointments:
+        print("Invalid appointment ID!")
+        return
+    
+    store.record("cancel", {"appointment_id": appointment_id})
+    print("Appointment canceled successfully!")
+
 def issue_prescription():
     """Issue a new prescription."""
     prescription_id = input("Enter prescription ID: ")
@@ -317,6 +1108,10 @@ def issue_prescription():
         print("Invalid doctor or patient ID!")
         return
     
+    if prescription_id in prescriptions:
+        print("Prescription ID already exists!")
+        return
+    
     medications = []
     while True:
         name = input("Enter medication name (or 'done' to finish): ")
@@ -326,38 +1121,376 @@ def issue_prescription():
         instructions = input("Enter instructions: ")
         medications.append({"name": name, "dosage": dosage, "instructions": instructions})
     
-    prescription = Prescription(prescription_id, doctor_id, patient_id, date, medications)
-    prescriptions[prescription_id] = prescription
+    store.record("prescription", {
+        "prescription_id": prescription_id,
+        "doctor_id": doctor_id,
+        "patient_id": patient_id,
+        "date": date,
+        "medications": medications
+    })
     print("Prescription issued successfully!")
 
+def parse_date(text):
+    """Return the date in YYYY-MM-DD form, or None if it is not a valid date."""
+    try:
+        return datetime.strptime(text.strip(), "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        return None
+
+def parse_time(text):
+    """Return the time in HH:MM form (e.g. "9:00" -> "09:00"), or None if it is not valid."""
+    try:
+        return datetime.strptime(text.strip(), "%H:%M").strftime("%H:%M")
+    except ValueError:
+        return None
+
+def add_doctor_availability():
+    """Add available time slots for a doctor."""
+    doctor_id = input("Enter doctor ID: ")
+    if doctor_id not in doctors:
+        print("Invalid doctor ID!")
+        return
+    
+    date = parse_date(input("Enter date (YYYY-MM-DD): "))
+    if not date:
+        print("Invalid date!")
+        return
+    
+    time_slots = [parse_time(time) for time in input("Enter time slots separated by commas (HH:MM): ").split(",")]
+    if not time_slots or None in time_slots:
+        print("Invalid time slot!")
+        return
+    
+    booked = [time for time in time_slots if (doctor_id, date, time) in booking_index.doctor_slots]
+    store.record("availability", {"doctor_id": doctor_id, "date": date, "time_slots": time_slots})
+    print("Availability added successfully!")
+    if booked:
+        print(f"Already booked, not added: {', '.join(booked)}")
+
+def find_next_slot():
+    """Show a doctor's next available slot."""
+    doctor_id = input("Enter doctor ID: ")
+    if doctor_id not in doctors:
+        print("Invalid doctor ID!")
+        return
+    
+    slot = doctors[doctor_id].next_available_slot()
+    if slot:
+        print(f"Next available slot: {slot[0]} at {slot[1]}")
+    else:
+        print("No available slots.")
+
+def find_slot_by_specialty():
+    """Show the earliest available slot for a specialty within a date range."""
+    specialty = input("Enter specialty: ")
+    if normalize_specialty(specialty) not in specialty_index:
+        print("No doctors found for that specialty.")
+        return
+    
+    today = datetime.now()
+    start_date = input("Enter start date (YYYY-MM-DD, blank for today): ").strip()
+    start_date = parse_date(start_date) if start_date else today.strftime("%Y-%m-%d")
+    end_date = input("Enter end date (YYYY-MM-DD, blank for one week): ").strip()
+    end_date = parse_date(end_date) if end_date else (today + timedelta(days=6)).strftime("%Y-%m-%d")
+    if not start_date or not end_date:
+        print("Invalid date!")
+        return
+    
+    slot = earliest_slot(specialty, start_date, end_date)
+    if slot:
+        date, time, doctor_id = slot
+        print(f"Earliest slot: {date} at {time} with Dr. {doctors[doctor_id].name} (ID: {doctor_id})")
+    else:
+        print("No available slots in that period.")
+
+def add_history_entry():
+    """Add an entry to a patient's medical history."""
+    patient_id = input("Enter patient ID: ")
+    if patient_id not in patients:
+        print("Invalid patient ID!")
+        return
+    
+    entry = input("Enter medical history entry: ").strip()
+    if not entry:
+        print("Entry cannot be empty!")
+        return
+    date = input("Enter date (YYYY-MM-DD, blank for today): ").strip()
+    if date and not parse_date(date):
+        print("Invalid date!")
+        return
+    
+    patients[patient_id].add_medical_history(entry, parse_date(date) if date else None)
+    print("Medical history updated successfully!")
+
+def view_medical_history():
+    """Page through a patient's medical history."""
+    patient_id = input("Enter patient ID: ")
+    if patient_id not in patients:
+        print("Invalid patient ID!")
+        return
+    
+    start_date = input("Enter start date (YYYY-MM-DD, blank for all): ").strip()
+    end_date = input("Enter end date (YYYY-MM-DD, blank for all): ").strip()
+    if (start_date and not parse_date(start_date)) or (end_date and not parse_date(end_date)):
+        print("Invalid date!")
+        return
+    
+    patient = patients[patient_id]
+    page = 1
+    while True:
+        entries = patient.medical_history_page(parse_date(start_date) if start_date else None,
+                                               parse_date(end_date) if end_date else None, page)
+        if not entries:
+            print("No more entries." if page > 1 else "No medical history found.")
+            return
+        print(f"\n--- Page {page} ---")
+        for record in entries:
+            print(f"{record['date'] or 'Undated'}: {record['entry']}")
+        if input("Press Enter for the next page or 'q' to stop: ").strip().lower() == "q":
+            return
+        page += 1
+
+def recall_lookup():
+    """List every patient prescribed a medication, e.g. for a drug recall."""
+    name = input("Enter medication name: ").strip()
+    if not name:
+        print("Medication name cannot be empty!")
+        return
+    prefix = input("Match names starting with this? (y/n): ").strip().lower() == "y"
+    start_date = input("Enter start date (YYYY-MM-DD, blank for all): ").strip()
+    end_date = input("Enter end date (YYYY-MM-DD, blank for all): ").strip()
+    if (start_date and not parse_date(start_date)) or (end_date and not parse_date(end_date)):
+        print("Invalid date!")
+        return
+    
+    affected_patients = set()
+    count = 0
+    for prescription, medication in medication_index.lookup(
+            name, prefix, parse_date(start_date) if start_date else None,
+            parse_date(end_date) if end_date else None):
+        print(f"Prescription {prescription.prescription_id} ({prescription.date}): "
+              f"patient {prescription.patient_id}, {medication}")
+        affected_patients.add(prescription.patient_id)
+        count += 1
+    
+    if not count:
+        print("No prescriptions found for that medication.")
+    else:
+        print(f"{count} prescription(s) for {len(affected_patients)} patient(s).")
+
+def batch_schedule():
+    """Book referral requests from a CSV file into free doctor slots."""
+    path = input("Enter referrals CSV file (patient_id,specialty,earliest_date,priority[,reason]): ").strip()
+    requests = []
+    invalid = []
+    try:
+        with open(path, "r", encoding="utf-8", newline="") as file:
+            for line_no, row in enumerate(csv.DictReader(file), start=2):
+                earliest_date = parse_date(row.get("earliest_date") or "")
+                try:
+                    priority = int(row.get("priority") or "")
+                except ValueError:
+                    priority = None
+                if not row.get("patient_id") or not row.get("specialty") or not earliest_date or priority is None:
+                    invalid.append(line_no)
+                    continue
+                requests.append({
+                    "patient_id": row["patient_id"].strip(),
+                    "specialty": row["specialty"],
+                    "earliest_date": earliest_date,
+                    "priority": priority,
+                    "reason": (row.get("reason") or "").strip()
+                })
+    except FileNotFoundError:
+        print("File not found!")
+        return
+    
+    if invalid:
+        print(f"Skipped {len(invalid)} invalid row(s), e.g. line(s) {', '.join(map(str, invalid[:10]))}")
+    
+    booked, unplaced = schedule_batch(requests)
+    print(f"Booked {len(booked)} appointment(s), {len(unplaced)} request(s) could not be placed.")
+    for request, reason in unplaced[:20]:
+        print(f"Patient {request['patient_id']} ({request['specialty']}, from {request['earliest_date']}): {reason}")
+    if len(unplaced) > 20:
+        print(f"... and {len(unplaced) - 20} more")
+
+# For each collection: the attribute used as its ID, and the attributes
+# the doctor / patient / date / status filters apply to
+QUERY_FIELDS = {
+    "patients": ("username", {"patient": "username"}),
+    "doctors": ("username", {"doctor": "username"}),
+    "appointments": ("appointment_id", {"doctor": "doctor_id", "patient": "patient_id",
+                                        "date": "date", "status": "status"}),
+    "prescriptions": ("prescription_id", {"doctor": "doctor_id", "patient": "patient_id", "date": "date"}),
+}
+
+def query_records(collection, doctor=None, patient=None, start_date=None, end_date=None, status=None):
+    """
+    Yield the records of a collection ("patients", "doctors", "appointments"
+    or "prescriptions") matching every filter given.
+    :raises ValueError: If the collection is unknown or a filter does not apply to it.
+    """
+    if collection not in QUERY_FIELDS:
+        raise ValueError(f"Unknown collection '{collection}'")
+    fields = QUERY_FIELDS[collection][1]
+    checks = []
+    for name, value in (("doctor", doctor), ("patient", patient), ("status", status)):
+        if value is None:
+            continue
+        if name not in fields:
+            raise ValueError(f"Cannot filter {collection} by {name}")
+        checks.append((fields[name], value))
+    if (start_date or end_date) and "date" not in fields:
+        raise ValueError(f"Cannot filter {collection} by date")
+
+    records = {"patients": patients, "doctors": doctors,
+               "appointments": appointments, "prescriptions": prescriptions}[collection]
+    for record in records.values():
+        if any(getattr(record, attribute) != value for attribute, value in checks):
+            continue
+        if start_date and record.date < start_date:
+            continue
+        if end_date and record.date > end_date:
+            continue
+        yield record
+
+def query_page(collection, filters=None, sort_by=None, descending=False, page_size=20, cursor=None):
+    """
+    Return one page of matching records and the cursor for the next page.
+    :param filters: Keyword filters for query_records (doctor, patient, start_date, end_date, status).
+    :param sort_by: Attribute to sort by, defaults to the record ID.
+    :param cursor: Value returned by the previous call, None for the first page.
+    :return: (records, next_cursor), where next_cursor is None on the last page.
+
+    Only the records on the page are kept in memory: the matching records
+    after the cursor are streamed through heapq.nsmallest/nlargest.
+    """
+    if collection not in QUERY_FIELDS:
+        raise ValueError(f"Unknown collection '{collection}'")
+    id_field = QUERY_FIELDS[collection][0]
+    sort_by = sort_by or id_field
+
+    def sort_key(record):
+        value = getattr(record, sort_by, None)
+        return [value is None, "" if value is None else str(value), getattr(record, id_field)]
+
+    records = query_records(collection, **(filters or {}))
+    if cursor is not None:
+        after = json.loads(cursor)
+        if descending:
+            records = (record for record in records if sort_key(record) < after)
+        else:
+            records = (record for record in records if sort_key(record) > after)
+
+    pick = heapq.nlargest if descending else heapq.nsmallest
+    page = pick(page_size + 1, records, key=sort_key)
+    if len(page) <= page_size:
+        return page, None
+    page = page[:page_size]
+    return page, json.dumps(sort_key(page[-1]))
+
+def export_jsonl(collection, path, **filters):
+    """
+    Stream matching records to a JSON Lines file, one to_dict() per line.
+    :return: The number of records written.
+    """
+    written = 0
+    with open(path, "w", encoding="utf-8") as file:
+        for record in query_records(collection, **filters):
+            file.write(json.dumps(record.to_dict()) + "\n")
+            written += 1
+    return written
+
+def login():
+    """Log in and start a session."""
+    username = input("Enter username: ")
+    password = input("Enter password: ")
+    token = sessions.login(username, password)
+    if token is None:
+        print("Invalid username or password!")
+        return None
+    print(f"Logged in as {username}.")
+    return token
+
 def view_data():
-    """View all data."""
-    print("\n--- Patients ---")
-    for patient in patients.values():
-        print(patient.view_details())
+    """Browse or export records page by page, with optional filters."""
+    collection = input("Enter collection (patients/doctors/appointments/prescriptions): ").strip().lower()
+    if collection not in QUERY_FIELDS:
+        print("Invalid collection!")
+        return
     
-    print("\n--- Doctors ---")
-    for doctor in doctors.values():
-        print(doctor.view_details())
+    fields = QUERY_FIELDS[collection][1]
+    filters = {}
+    for name in ("doctor", "patient", "status"):
+        if name in fields:
+            value = input(f"Filter by {name} (blank for any): ").strip()
+            if value:
+                filters[name] = value
+    if "date" in fields:
+        for name, label in (("start_date", "from"), ("end_date", "to")):
+            value = input(f"Filter by date {label} (YYYY-MM-DD, blank for any): ").strip()
+            if value and not parse_date(value):
+                print("Invalid date!")
+                return
+            if value:
+                filters[name] = parse_date(value)
+    
+    output = input("Enter a .jsonl file to export to (blank to view on screen): ").strip()
+    if output:
+        print(f"Exported {export_jsonl(collection, output, **filters)} record(s) to {output}")
+        return
     
-    print("\n--- Appointments ---")
-    for appointment in appointments.values():
-        print(appointment.view_details())
+    sort_by = input("Sort by field (blank for ID): ").strip() or None
+    descending = input("Descending order? (y/n): ").strip().lower() == "y"
     
-    print("\n--- Prescriptions ---")
-    for prescription in prescriptions.values():
-        print(prescription.view_details())
+    cursor = None
+    page_number = 1
+    while True:
+        page, cursor = query_page(collection, filters, sort_by, descending, cursor=cursor)
+        if not page:
+            print("No records found.")
+            return
+        print(f"\n--- {collection.title()}, page {page_number} ---")
+        for record in page:
+            print(record.view_details())
+        if cursor is None:
+            return
+        if input("Press Enter for the next page or 'q' to stop: ").strip().lower() == "q":
+            return
+        page_number += 1
 
 def main():
     """Main function to run the CLI."""
+    try:
+        store.load()
+    except (ValueError, KeyError) as e:
+        print(f"Error: Could not load saved records: {e}")
+        return
+    
+    token = None
     while True:
         print("\n--- Hospital Patient Records System ---")
+        user = sessions.verify(token)
+        if user:
+            print(f"(Logged in as {user})")
         print("1. Create Patient")
         print("2. Create Doctor")
         print("3. Schedule Appointment")
         print("4. Issue Prescription")
-        print("5. View All Data")
-        print("6. Exit")
+        print("5. View Data")
+        print("6. Add Doctor Availability")
+        print("7. Find Next Available Slot")
+        print("8. Reschedule Appointment")
+        print("9. Cancel Appointment")
+        print("10. Find Earliest Slot by Specialty")
+        print("11. Add Medical History")
+        print("12. View Medical History")
+        print("13. Medication Recall Lookup")
+        print("14. Batch Schedule Referrals")
+        print("15. Login")
+        print("16. Logout")
+        print("17. Exit")
         
         choice = input("Enter your choice: ")
         
@@ -372,6 +1505,35 @@ def main():
         elif choice == "5":
             view_data()
         elif choice == "6":
+            add_doctor_availability()
+        elif choice == "7":
+            find_next_slot()
+        elif choice == "8":
+            reschedule_appointment()
+        elif choice == "9":
+            cancel_appointment()
+        elif choice == "10":
+            find_slot_by_specialty()
+        elif choice == "11":
+            add_history_entry()
+        elif choice == "12":
+            view_medical_history()
+        elif choice == "13":
+            recall_lookup()
+        elif choice == "14":
+            batch_schedule()
+        elif choice == "15":
+            token = login() or token
+        elif choice == "16":
+            if sessions.verify(token):
+                sessions.logout(token)
+                print("Logged out.")
+            else:
+                print("Not logged in.")
+            token = None
+        elif choice == "17":
+            store.snapshot()
+            store.close()
             print("Exiting the system. Goodbye!")
             break
         else:
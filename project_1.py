@@ -1,10 +1,363 @@
 import json
 import csv
-import random
+import gc
+import operator
+import os
+import re
+import struct
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+from itertools import islice
 
 
-class Patient:
+# Version of the field layout written by the compact JSON and binary formats
+SCHEMA_VERSION = 1
+BINARY_MAGIC = b"HMS2"
+_BINARY_HEADER = struct.Struct("<4sHI")  # magic, schema version, length of the JSON field list
+_ROW_LENGTH = struct.Struct("<I")
+_encode_json = json.JSONEncoder(separators=(",", ":")).encode
+
+_ARRAY_GAP = re.compile(r"[\s,]*")
+_LINE_GAP = re.compile(r"\s*")
+_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+_TIME = re.compile(r"\d{2}:\d{2}")
+
+# Free-text availability, e.g. "Mon-Fri 09:00-17:00", "Mon, Wed and Fri 9am-1pm", "weekdays", "20days"
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+_DAY_NAME = r"\b(mon(?:day)?|tue(?:s|sday)?|wed(?:s|nesday)?|thu(?:r|rs|rsday)?|fri(?:day)?|sat(?:urday)?|sun(?:day)?)\b"
+_DAY_RANGE = re.compile(_DAY_NAME + r"(?:\s*(?:-|to|through)\s*" + _DAY_NAME + ")?")
+_HOURS = re.compile(r"(\d{1,2})(?::(\d{2}))?\s*(am|pm)?\s*(?:-|to)\s*(\d{1,2})(?::(\d{2}))?\s*(am|pm)?")
+_DAY_COUNT = re.compile(r"(\d+)\s*days?\b")
+_DAY_WORDS = {
+    "weekdays": range(5), "weekday": range(5), "weekends": range(5, 7), "weekend": range(5, 7),
+    "daily": range(7), "everyday": range(7), "every day": range(7), "all week": range(7),
+}
+
+
+def iter_json_records(path, chunk_size=65536):
+    """Yield records one at a time from a JSON array file or a JSON Lines file.
+    
+    The file is read in chunks, so only the current chunk and the record being
+    decoded are held in memory, however large the file is.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as file:
+        buffer = ""
+        position = 0
+        eof = False
+        in_array = None  # Decided by the first non-space character
+        
+        while True:
+            # Skip whitespace and, inside an array, the separating commas
+            position = (_ARRAY_GAP if in_array else _LINE_GAP).match(buffer, position).end()
+            
+            if position == len(buffer):
+                if eof:
+                    if in_array:
+                        raise ValueError(f"{path}: JSON array is missing its closing ']'")
+                    return
+                buffer = file.read(chunk_size)
+                position = 0
+                eof = not buffer
+                continue
+            
+            if in_array is None:
+                in_array = buffer[position] == "["
+                if in_array:
+                    position += 1
+                continue
+            if in_array and buffer[position] == "]":
+                return
+            
+            try:
+                record, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # The record runs past the buffered text, read more of it
+                # (at least doubling the buffer so huge records stay linear)
+                chunk = file.read(max(chunk_size, len(buffer) - position))
+                eof = not chunk
+                buffer = buffer[position:] + chunk
+                position = 0
+                continue
+            position = end
+            yield record
+
+
+# Binary value type tags: (tag, text) from a value, and the value back from its text
+_DECODE_VALUE = {
+    "s": str,
+    "i": int,
+    "f": float,
+    "n": lambda text: None,
+    "b": lambda text: text == "1",
+    "j": json.loads,
+}
+
+
+def _encode_value(value):
+    if value is None:
+        return "n", ""
+    if isinstance(value, bool):
+        return "b", "1" if value else "0"
+    if isinstance(value, int):
+        return "i", str(value)
+    if isinstance(value, float):
+        return "f", repr(value)
+    if isinstance(value, str) and "\0" not in value:
+        return "s", value
+    return "j", json.dumps(value)  # Escapes NUL, and covers lists and dicts
+
+
+def iter_binary_records(path, chunk_size=1 << 20):
+    """Yield the header and then each row of a file written by write_binary
+    
+    The header is the same {"schema_version": ..., "fields": [...]} dict a
+    compact JSON file starts with, and rows are lists of values, so
+    load_records reads both formats the same way.
+    """
+    with open(path, "rb") as file:
+        magic, version, size = _BINARY_HEADER.unpack(file.read(_BINARY_HEADER.size))
+        if magic != BINARY_MAGIC:
+            raise ValueError(f"{path}: not a binary record file")
+        fields = json.loads(file.read(size))
+        yield {"schema_version": version, "fields": fields}
+        all_text = "s" * len(fields)
+        
+        # Each row: its byte length, then the UTF-8 values and their type tags separated by NUL characters
+        unpack = _ROW_LENGTH.unpack_from
+        size = _ROW_LENGTH.size
+        buffer = file.read(chunk_size)
+        position = 0
+        while True:
+            if position + size <= len(buffer):
+                end = position + size + unpack(buffer, position)[0]
+                if end <= len(buffer):
+                    values = buffer[position + size:end].decode().split("\0")
+                    tags = values.pop()
+                    if tags != all_text:
+                        values = [_DECODE_VALUE[tag](value) for tag, value in zip(tags, values)]
+                    yield values
+                    position = end
+                    continue
+            
+            # The next row runs past the buffered bytes
+            chunk = file.read(chunk_size)
+            if not chunk:
+                if position < len(buffer):
+                    raise ValueError(f"{path}: last record is truncated")
+                return
+            buffer = buffer[position:] + chunk
+            position = 0
+
+
+def write_compact_json(file, record_class, records):
+    """Write records as a JSON array of rows, after a header naming the fields"""
+    file.write("[" + _encode_json({"schema_version": SCHEMA_VERSION, "fields": record_class.FIELDS}))
+    file.writelines(",\n" + _encode_json(row) for row in map(record_class.row_getter, records))
+    file.write("]\n")
+
+
+def write_binary(file, record_class, records):
+    """Write records in the struct-packed binary format read by iter_binary_records
+    
+    Each row ends with one type tag per value (see _encode_value), so numbers,
+    None and booleans come back as they went in. Rows of plain strings, the
+    usual case, are written and read without per-value work.
+    """
+    fields = json.dumps(record_class.FIELDS).encode()
+    file.write(_BINARY_HEADER.pack(BINARY_MAGIC, SCHEMA_VERSION, len(fields)) + fields)
+    pack = _ROW_LENGTH.pack
+    width = len(record_class.FIELDS)
+    all_text = "s" * width
+    for row in map(record_class.row_getter, records):
+        try:
+            data = "\0".join(row)
+        except TypeError:  # Not all strings
+            data = None
+        if data is not None and data.count("\0") == width - 1:
+            tags = all_text
+        else:
+            tags, values = zip(*map(_encode_value, row))
+            tags = "".join(tags)
+            data = "\0".join(values)
+        data = (data + "\0" + tags).encode()
+        file.write(pack(len(data)) + data)
+
+
+def write_atomic(path, write, newline=None, binary=False):
+    """Write a file through a temporary file, so a crash never leaves it half written
+    
+    write is called with the open temporary file.
+    """
+    temp_path = path + ".tmp"
+    try:
+        with (open(temp_path, "wb") if binary else open(temp_path, "w", encoding="utf-8", newline=newline)) as file:
+            write(file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        # Leave the old file as it was and no half-written temporary file behind
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def valid_date(text):
+    """Check a YYYY-MM-DD date"""
+    if not _DATE.fullmatch(text):
+        return False
+    try:
+        datetime.strptime(text, "%Y-%m-%d")
+    except ValueError:
+        return False
+    return True
+
+
+def valid_time(text):
+    """Check an HH:MM time"""
+    return bool(_TIME.fullmatch(text)) and text[:2] < "24" and text[3:] < "60"
+
+
+@contextmanager
+def gc_paused():
+    """Pause the cycle collector while building millions of objects
+    
+    None of the records form cycles, but every allocation still counts
+    towards the next collection, which would run over and over.
+    """
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+def iter_batches(rows, size):
+    """Yield lists of up to size rows"""
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Availability(namedtuple("Availability", "weekdays days_per_week start end")):
+    """A doctor's parsed availability
+    
+    weekdays: frozenset of weekday numbers (0 = Monday), empty if the text
+    only gives a number of days. days_per_week: how many days a week the
+    doctor works, None if the text could not be understood. start, end:
+    working hours as minutes after midnight.
+    """
+    __slots__ = ()
+    
+    def slots_per_day(self, slot_minutes=30):
+        """Number of appointment slots in a working day"""
+        return max(self.end - self.start, 0) // slot_minutes
+    
+    def works_on(self, weekday):
+        """Whether the doctor works on a weekday, or None if only a day count is known"""
+        if not self.weekdays:
+            return None if self.days_per_week else False
+        return weekday in self.weekdays
+
+
+def _minutes(hour, minute, meridiem):
+    hour = int(hour) % 12 + 12 if meridiem == "pm" else int(hour) % 12 if meridiem == "am" else int(hour)
+    return hour * 60 + int(minute or 0)
+
+
+@lru_cache(maxsize=None)
+def parse_availability(text, default_start=9 * 60, default_end=17 * 60):
+    """Parse free-text available days into an Availability
+    
+    Understands day names and ranges ("Mon-Fri", "Tuesday and Thursday"),
+    "weekdays"/"weekends"/"daily", hours ("09:00-17:00", "9am-1pm", "9-5";
+    09:00-17:00 if not given) and day counts ("3 days", "20days"; counts
+    above 7 are taken as days a month). Cached, as doctors share a few
+    distinct texts.
+    """
+    text = text.lower()
+    start, end = default_start, default_end
+    hours = _HOURS.search(text)
+    if hours:
+        start = _minutes(hours.group(1), hours.group(2), hours.group(3))
+        end = _minutes(hours.group(4), hours.group(5), hours.group(6))
+        if end <= start and not hours.group(6):
+            end += 12 * 60  # "9-5" means 9am to 5pm
+        text = text[:hours.start()] + " " + text[hours.end():]
+    
+    weekdays = set()
+    for words, days in _DAY_WORDS.items():
+        if words in text:
+            weekdays.update(days)
+    for match in _DAY_RANGE.finditer(text):
+        first = WEEKDAYS.index(match.group(1)[:3])
+        last = WEEKDAYS.index(match.group(2)[:3]) if match.group(2) else first
+        weekdays.update(day % 7 for day in range(first, first + (last - first) % 7 + 1))
+    
+    days_per_week = len(weekdays) or None
+    count = _DAY_COUNT.search(text)
+    if not weekdays and count:
+        days = int(count.group(1))
+        days_per_week = days if days <= 7 else days * 12 / 52  # Days a month
+    return Availability(frozenset(weekdays), days_per_week, start, end)
+
+
+class DateRangeFilter:
+    """Record filter keeping records dated start_date..end_date (inclusive)
+    
+    A class rather than a closure so it can be sent to worker processes.
+    """
+    def __init__(self, start_date=None, end_date=None):
+        self.start_date = start_date
+        self.end_date = end_date
+    
+    def __call__(self, record):
+        if self.start_date and record.date < self.start_date:
+            return False
+        if self.end_date and record.date > self.end_date:
+            return False
+        return True
+
+
+class Record:
+    """Base of the stored models: the fields are listed once in FIELDS and kept in __slots__"""
+    __slots__ = ()
+    FIELDS = ()
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.row_getter = operator.attrgetter(*cls.FIELDS)  # record -> tuple of values, for bulk map()
+    
+    def to_row(self):
+        """Field values in FIELDS order"""
+        return self.row_getter(self)
+    
+    def to_dict(self):
+        """Field values keyed by name"""
+        return dict(zip(self.FIELDS, self.row_getter(self)))
+    
+    def __reduce__(self):
+        # Pickle as a row (e.g. for process pool loading), much smaller than slot state
+        return (self.__class__, self.row_getter(self))
+
+
+class Patient(Record):
     """Class Patient"""
+    FIELDS = ("patient_id", "name", "gender", "age")
+    __slots__ = FIELDS
+    
     def __init__(self, patient_id, name, gender, age):
         self.patient_id = patient_id
         self.name = name
@@ -19,13 +372,21 @@ class Patient:
         )
 
 
-class Doctor:
+class Doctor(Record):
     """Class Doctor"""
+    FIELDS = ("doctor_id", "name", "specialization", "available_days")
+    __slots__ = FIELDS
+    
     def __init__(self, doctor_id, name, specialization, available_days):
         self.doctor_id = doctor_id
         self.name = name
         self.specialization = specialization
         self.available_days = available_days
+    
+    @property
+    def availability(self):
+        """available_days parsed into an Availability"""
+        return parse_availability(self.available_days)
         
     def display_details(self):
         """Display doctor details"""
@@ -35,8 +396,11 @@ class Doctor:
         )
 
 
-class Appointment:
+class Appointment(Record):
     """Class Appointment"""
+    FIELDS = ("appointment_id", "patient_id", "doctor_id", "date", "time")
+    __slots__ = FIELDS
+    
     def __init__(self, appointment_id, patient_id, doctor_id, date, time):
         self.appointment_id = appointment_id
         self.patient_id = patient_id
@@ -52,53 +416,187 @@ class Appointment:
         )
 
 
+class IdAllocator:
+    """Hand out sequential IDs per record kind (patient, doctor, appointment)"""
+    def __init__(self, state_file='id_state.json', width=4, prefixes=None):
+        self.state_file = state_file
+        self.width = width  # Minimum number of digits, longer numbers are not cut off
+        self.prefixes = prefixes or {}  # e.g. {"patient": "P"} gives "P0001"
+        self.counters = {}  # Highest number issued per kind
+    
+    def format_id(self, kind, number):
+        """Format a number as an ID for the given kind"""
+        return f"{self.prefixes.get(kind, '')}{number:0{self.width}d}"
+    
+    def allocate(self, kind):
+        """Return the next unused ID for a kind"""
+        self.counters[kind] = self.counters.get(kind, 0) + 1
+        return self.format_id(kind, self.counters[kind])
+    
+    def reserve(self, kind, count):
+        """Reserve a block of IDs for a kind in one step, e.g. for an import"""
+        start = self.counters.get(kind, 0) + 1
+        self.counters[kind] = start + count - 1
+        return [self.format_id(kind, number) for number in range(start, start + count)]
+    
+    def observe(self, kind, ids):
+        """Move the high-water mark past existing IDs so they are never handed out again"""
+        prefix = self.prefixes.get(kind, '')
+        highest = self.counters.get(kind, 0)
+        for record_id in ids:
+            number = record_id[len(prefix):] if record_id.startswith(prefix) else ''
+            if number.isdigit() and int(number) > highest:
+                highest = int(number)
+        self.counters[kind] = highest
+    
+    def load(self):
+        """Load saved high-water marks"""
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as file:
+                state = json.load(file)
+        except FileNotFoundError:
+            return
+        for kind, number in state.get("counters", {}).items():
+            self.counters[kind] = max(self.counters.get(kind, 0), number)
+    
+    def save(self):
+        """Save high-water marks"""
+        write_atomic(self.state_file, lambda file: json.dump({"counters": self.counters}, file, indent=4))
+
+
+# Collection name: (record class, field names in column order, ID kind)
+# The first field is the record's ID
+COLLECTIONS = {
+    "patients": (Patient, Patient.FIELDS, "patient"),
+    "doctors": (Doctor, Doctor.FIELDS, "doctor"),
+    "appointments": (Appointment, Appointment.FIELDS, "appointment"),
+}
+
+
+LOAD_FIELDS = ("doctor_id", "name", "period", "appointments", "capacity", "utilization")
+
+
+def export_doctor_load(rows, path):
+    """Write Hospital.doctor_load rows to a CSV file for capacity planning"""
+    def write(file):
+        writer = csv.DictWriter(file, LOAD_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    
+    write_atomic(path, write, newline="")
+
+
+def newest_file(path):
+    """Return a .json path, or its .jsonl append log (see Hospital.save_to_json) when that is newer"""
+    log_path = os.path.splitext(path)[0] + ".jsonl"
+    if not path.endswith(".json") or not os.path.exists(log_path):
+        return path
+    if os.path.exists(path) and os.path.getmtime(path) > os.path.getmtime(log_path):
+        return path
+    return log_path
+
+
+def load_records(path, record_class, id_field, record_filter=None):
+    """Load one JSON, JSON Lines or binary (.bin) file into a dict of objects keyed by ID
+    
+    Records may be JSON objects or compact rows. Rows follow the header
+    record's field list, which lets files written with another field order
+    still load; without a header they are in record_class.FIELDS order.
+    
+    Returns (records, duplicates). In a JSON Lines file a repeated ID is a
+    later update (see Hospital.save_to_json(append=True)) and simply wins.
+    Elsewhere it is a duplicate: the last copy is kept and the ones it
+    replaced are returned in duplicates.
+    """
+    with gc_paused():
+        return _load_records(path, record_class, id_field, record_filter)
+
+
+def _load_records(path, record_class, id_field, record_filter):
+    records = {}
+    duplicates = []
+    updates = path.endswith(".jsonl")
+    fields = None  # Row field order, when it differs from record_class.FIELDS
+    for data in (iter_binary_records if path.endswith(".bin") else iter_json_records)(path):
+        if isinstance(data, list):
+            record = record_class(*data) if fields is None else record_class(**dict(zip(fields, data)))
+        elif "schema_version" in data:
+            if data["schema_version"] > SCHEMA_VERSION:
+                raise ValueError(f"{path}: written by a newer version (schema {data['schema_version']})")
+            fields = tuple(data["fields"])
+            if fields == record_class.FIELDS:
+                fields = None
+            continue
+        else:
+            record = record_class(**data)
+        
+        if record_filter is None or record_filter(record):
+            record_id = getattr(record, id_field)
+            if not updates and record_id in records:
+                duplicates.append(records[record_id])
+            records[record_id] = record
+        elif updates:
+            # A later version that fails the filter replaces an earlier one that passed it
+            records.pop(getattr(record, id_field), None)
+    return records, duplicates
+
+
 class Hospital:
     """Class Hospital"""
     def __init__(self):
-        self.patients = []
-        self.doctors = []
-        self.appointments = []
+        # Records are keyed by their ID so lookups don't scan every record
+        self.patients = {}
+        self.doctors = {}
+        self.appointments = {}
+        # Appointment indexes: (doctor_id, date) -> [(time, appointment_id), ...] kept sorted,
+        # and patient_id -> [appointment_id, ...]
+        self.day_index = {}
+        self.patient_index = {}
+        # IDs added or changed since the last load/save, per collection (dicts keep insertion order)
+        self.dirty = {"patients": {}, "doctors": {}, "appointments": {}}
+        self.partial = set()  # Collections loaded with a filter, which must not overwrite their file
+        self.sources = {}  # File each collection was last loaded from or saved to
+        # Records dropped because a later record in the same JSON array had their ID
+        self.duplicates = {"patients": [], "doctors": [], "appointments": []}
+        self.ids = IdAllocator()
+        self.ids.load()
         
     # Patient management method
     def add_patient(self, patient):
         """Add patient"""
-        self.patients.append(patient)
+        self.patients[patient.patient_id] = patient
+        self.dirty["patients"][patient.patient_id] = None
         print(f"Patient {patient.name} added successfully")
     
     def search_patient(self, patient_id):
         """Search for patient"""
-        for patient in self.patients:
-            if patient.patient_id == patient_id:
-                return patient
-        return None
+        return self.patients.get(patient_id)
     
     def display_patient(self):
         """Display patient"""
         if not self.patients:
             print("No patient recorded")
         else:
-            for patient in self.patients:
+            for patient in self.patients.values():
                 print(patient.display_details())
     
     # Doctor management method
     def add_doctor(self, doctor):
         """Add doctors"""
-        self.doctors.append(doctor)
+        self.doctors[doctor.doctor_id] = doctor
+        self.dirty["doctors"][doctor.doctor_id] = None
         print(f"Doctor {doctor.name} added successfully")
     
     def search_doctor(self, doctor_id):
         """Search for doctor"""
-        for doctor in self.doctors:
-            if doctor.doctor_id == doctor_id:
-                return doctor
-        return None
+        return self.doctors.get(doctor_id)
 
     def display_doctor(self):
         """Display doctor"""
         if not self.doctors:
             print("No doctor recorded")
         else:
-            for doctor in self.doctors:
+            for doctor in self.doctors.values():
                 print(doctor.display_details())
                 
     # Appointment management method
@@ -115,81 +613,463 @@ class Hospital:
             print(f"No doctor found with ID {appointment.doctor_id}")
             return
         
-        self.appointments.append(appointment)
+        old = self.appointments.get(appointment.appointment_id)
+        if old:
+            self._unindex_appointment(old)
+        self.appointments[appointment.appointment_id] = appointment
+        self._index_appointment(appointment)
+        self.dirty["appointments"][appointment.appointment_id] = None
         print(f"Appointment booked successfully: {appointment.display_details()}")
     
+    def _index_appointment(self, appointment):
+        insort(self.day_index.setdefault((appointment.doctor_id, appointment.date), []),
+               (appointment.time, appointment.appointment_id))
+        self.patient_index.setdefault(appointment.patient_id, []).append(appointment.appointment_id)
+    
+    def _unindex_appointment(self, appointment):
+        key = (appointment.doctor_id, appointment.date)
+        day = self.day_index[key]
+        day.remove((appointment.time, appointment.appointment_id))
+        if not day:
+            del self.day_index[key]
+        booked = self.patient_index[appointment.patient_id]
+        booked.remove(appointment.appointment_id)
+        if not booked:
+            del self.patient_index[appointment.patient_id]
+    
+    def day_sheet(self, doctor_id, date, start_time=None, end_time=None):
+        """Return a doctor's appointments on a date in time order, optionally only start_time..end_time"""
+        day = self.day_index.get((doctor_id, date), [])
+        time_of = operator.itemgetter(0)
+        low = bisect_left(day, start_time, key=time_of) if start_time else 0
+        high = bisect_right(day, end_time, key=time_of) if end_time else len(day)
+        return [self.appointments[appointment_id] for _, appointment_id in day[low:high]]
+    
+    def patient_appointments(self, patient_id):
+        """Return a patient's appointments by date and time"""
+        booked = [self.appointments[appointment_id] for appointment_id in self.patient_index.get(patient_id, [])]
+        booked.sort(key=operator.attrgetter("date", "time"))
+        return booked
+    
     def display_appointment(self):
         """Display appointment"""
         if not self.appointments:
             print("No appointment booked.")
         else:
-            for appointment in self.appointments:
+            for appointment in self.appointments.values():
                 print(appointment.display_details())
     
-    def save_to_json(self, patient_file='patients.json', doctor_file='doctors.json', appointment_file='appointments.json'):
-        """Save data to json"""
-        
-        # Save patients
-        with open(patient_file, "w", encoding="utf-8") as file:
-            json.dump([patient.__dict__ for patient in self.patients], file, indent=4)
-
-        # Save doctors
-        with open(doctor_file, "w", encoding="utf-8") as file:
-            json.dump([doctor.__dict__ for doctor in self.doctors], file, indent=4)
+    def save_to_json(self, patient_file='patients.json', doctor_file='doctors.json', appointment_file='appointments.json',
+                     append=False):
+        """Save data to json
         
-        # Save appointments
-        with open(appointment_file, "w", encoding="utf-8") as file:
-            json.dump([appointment.__dict__ for appointment in self.appointments], file, indent=4)
+        Only collections changed since the last load or save are written, and
+        each file is replaced atomically, as a compact array of rows (see
+        write_compact_json). With append=True the changed records are appended
+        to JSON Lines files instead (patients.jsonl, ...), so a save costs
+        O(changes) rather than rewriting everything. A .jsonl file that is
+        behind the data in memory (e.g. after a load from the .json file) is
+        rewritten in full first. load_from_json reads whichever of the two
+        files is newer.
+        """
+        collections = [
+            ("patients", patient_file, self.patients),
+            ("doctors", doctor_file, self.doctors),
+            ("appointments", appointment_file, self.appointments),
+        ]
+        saved = 0
+        for name, path, records in collections:
+            changed = self.dirty[name]
+            if not changed:
+                continue
+            
+            rewrite = True
+            if append:
+                path = os.path.splitext(path)[0] + ".jsonl"
+                # A changed ID that is gone was removed (see validate), which appending
+                # can't express, and a log that was not kept up to date is missing records
+                removed = any(record_id not in records for record_id in changed)
+                rewrite = removed or not os.path.exists(path) or self.sources.get(name, path) != path
+            if name in self.partial and rewrite:
+                print(f"Skipped {path}: {name} were loaded with a filter, saving would drop the rest")
+                continue
+            
+            if append:
+                lines = (_encode_json(records[record_id].to_row()) + "\n" for record_id in changed)
+                if not rewrite:
+                    with open(path, "a", encoding="utf-8") as file:
+                        file.writelines(lines)
+                        file.flush()
+                        os.fsync(file.fileno())
+                else:
+                    record_class = COLLECTIONS[name][0]
+                    
+                    def write_lines(file):
+                        file.write(_encode_json({"schema_version": SCHEMA_VERSION, "fields": record_class.FIELDS}) + "\n")
+                        file.writelines(_encode_json(row) + "\n" for row in map(record_class.row_getter, records.values()))
+                    
+                    write_atomic(path, write_lines)
+            else:
+                write_atomic(path, lambda file: write_compact_json(file, COLLECTIONS[name][0], records.values()))
+            
+            self.sources[name] = path
+            changed.clear()
+            saved += 1
         
-        print("Data saved to JSON files successfully.")
+        self.ids.save()
+        if saved:
+            print("Data saved to JSON files successfully.")
+        else:
+            print("No changes to save.")
     
-    def load_from_json(self, patient_file='patients.json', doctor_file='doctors.json', appointment_file='appointments.json'):
-        """Load data from json"""
-        try:
-            # Load patients
-            with open(patient_file, "r", encoding="utf-8") as file:
-                patients_data = json.load(file)
-                self.patients = [Patient(**data) for data in patients_data]  
+    def load_from_json(self, patient_file='patients.json', doctor_file='doctors.json', appointment_file='appointments.json',
+                       appointment_filter=None, parallel=None):
+        """Load data from json
+        
+        Files may be JSON arrays or JSON Lines, of objects or compact rows, or
+        binary .bin files (see save_to_binary). Records are streamed, so memory
+        use stays close to the size of the loaded objects. appointment_filter,
+        e.g. DateRangeFilter("2025-01-01", "2025-01-31"), loads only the
+        appointments it returns True for.
+        
+        A .json file is replaced by its .jsonl append log when the log is
+        newer (see save_to_json). Each file is loaded on its own: a missing or
+        broken file is reported and leaves that collection unchanged, the
+        others still load.
+        parallel="thread" or "process" loads the three files at the same time.
+        Parsing holds the GIL, so threads only help when reading the files is
+        slow (e.g. network storage), and processes pay for sending every object
+        back; see benchmarks.py project1_parallel_load before turning it on.
+        """
+        jobs = {
+            "patients": (newest_file(patient_file), Patient, "patient_id", None),
+            "doctors": (newest_file(doctor_file), Doctor, "doctor_id", None),
+            "appointments": (newest_file(appointment_file), Appointment, "appointment_id", appointment_filter),
+        }
+        
+        results = {}
+        if parallel is None:
+            for name, job in jobs.items():
+                try:
+                    results[name] = load_records(*job)
+                except Exception as e:
+                    results[name] = e
+        else:
+            executor_class = ProcessPoolExecutor if parallel == "process" else ThreadPoolExecutor
+            with executor_class(max_workers=len(jobs)) as executor:
+                futures = {name: executor.submit(load_records, *job) for name, job in jobs.items()}
+                for name, future in futures.items():
+                    try:
+                        results[name] = future.result()
+                    except Exception as e:
+                        results[name] = e
+        
+        loaded = 0
+        for name, result in results.items():
+            path = jobs[name][0]
+            if isinstance(result, FileNotFoundError):
+                print(f"File not found: {path}")
+                continue
+            if isinstance(result, Exception):
+                print(f"Could not load {path}: {result}")
+                continue
             
-            # Load doctors
-            with open(doctor_file, "r", encoding="utf-8") as file:
-                doctors_data = json.load(file)
-                self.doctors = [Doctor(**data) for data in doctors_data]   
+            records, duplicates = result
+            setattr(self, name, records)
+            self.duplicates[name] = duplicates
+            if duplicates:
+                print(f"Warning: {len(duplicates)} duplicate ID(s) in {path}, the last copy of each was kept")
+            self.rebuild_indexes(name)
+            # Memory now matches the file
+            self.sources[name] = path
+            self.dirty[name].clear()
+            self.partial.discard(name)
+            loaded += 1
+        
+        if appointment_filter and not isinstance(results["appointments"], Exception):
+            self.partial.add("appointments")
+        return loaded == len(jobs)
+    
+    def save_to_binary(self, patient_file='patients.bin', doctor_file='doctors.bin', appointment_file='appointments.bin'):
+        """Save every collection in the struct-packed binary format (see write_binary)
+        
+        A compact snapshot that loads faster than JSON; load it back with
+        load_from_json(patient_file, doctor_file, appointment_file).
+        """
+        collections = [("patients", patient_file), ("doctors", doctor_file), ("appointments", appointment_file)]
+        skipped = []
+        for name, path in collections:
+            if name in self.partial:
+                print(f"Skipped {path}: {name} were loaded with a filter, saving would drop the rest")
+                skipped.append(name)
+                continue
+            records = getattr(self, name).values()
+            write_atomic(path, lambda file: write_binary(file, COLLECTIONS[name][0], records), binary=True)
+        self.ids.save()
+        if skipped:
+            print(f"Data saved to binary files, except {', '.join(skipped)}.")
+        else:
+            print("Data saved to binary files successfully.")
+    
+    def rebuild_indexes(self, name):
+        """Rebuild everything derived from a collection after it was replaced or bulk loaded"""
+        self.ids.observe(COLLECTIONS[name][2], getattr(self, name))
+        if name == "appointments":
+            day_index = {}
+            patient_index = {}
+            with gc_paused():
+                for appointment in self.appointments.values():
+                    key = (appointment.doctor_id, appointment.date)
+                    entry = (appointment.time, appointment.appointment_id)
+                    day = day_index.get(key)
+                    if day is None:
+                        day_index[key] = [entry]
+                    else:
+                        day.append(entry)
+                    booked = patient_index.get(appointment.patient_id)
+                    if booked is None:
+                        patient_index[appointment.patient_id] = [appointment.appointment_id]
+                    else:
+                        booked.append(appointment.appointment_id)
+                for day in day_index.values():
+                    day.sort()
+            self.day_index = day_index
+            self.patient_index = patient_index
+    
+    def doctor_load(self, period="day", start_date=None, end_date=None, slot_minutes=30):
+        """Appointments per doctor per day or ISO week, utilization against availability, and peak hours
+        
+        One pass over the doctor-day index counts appointments per (doctor,
+        period) and per hour. Capacity is the doctor's slots per working day
+        (see Availability) times the days they work in the period;
+        utilization is None when there is no capacity to compare against.
+        Returns (rows, peak_hours): rows are dicts with LOAD_FIELDS keys,
+        sorted by doctor and period, and peak_hours a Counter of "HH" hours.
+        """
+        counts = Counter()
+        hours = Counter()
+        periods = {}  # date -> (period label, weekday or None if the date is malformed)
+        for (doctor_id, date), day in self.day_index.items():
+            if (start_date and date < start_date) or (end_date and date > end_date):
+                continue
+            if date not in periods:
+                try:
+                    parsed = datetime.strptime(date, "%Y-%m-%d")
+                except ValueError:
+                    periods[date] = (date, None)
+                else:
+                    if period == "week":
+                        year, week, _ = parsed.isocalendar()
+                        periods[date] = (f"{year}-W{week:02d}", None)
+                    else:
+                        periods[date] = (date, parsed.weekday())
+            counts[(doctor_id, periods[date][0])] += len(day)
+            hours.update(time[:2] for time, _ in day)
+        
+        weekday_of = {label: weekday for label, weekday in periods.values()}
+        rows = []
+        for (doctor_id, label), booked in sorted(counts.items()):
+            doctor = self.doctors.get(doctor_id)
+            capacity = None
+            availability = doctor.availability if doctor else None
+            if availability and availability.days_per_week is not None:
+                slots = availability.slots_per_day(slot_minutes)
+                if period == "week":
+                    days = availability.days_per_week
+                elif weekday_of[label] is None:
+                    days = None
+                else:
+                    works = availability.works_on(weekday_of[label])
+                    days = availability.days_per_week / 7 if works is None else int(works)
+                if days is not None:
+                    capacity = round(slots * days, 1)
+            rows.append({
+                "doctor_id": doctor_id,
+                "name": doctor.name if doctor else "",
+                "period": label,
+                "appointments": booked,
+                "capacity": capacity,
+                "utilization": round(booked / capacity, 3) if capacity else None,
+            })
+        return rows, hours
+    
+    def validate(self, quarantine=False, quarantine_file='quarantine.jsonl'):
+        """Check every appointment points at a stored patient and doctor, and report duplicate IDs
+        
+        The patient and doctor IDs appointments refer to are taken from the
+        appointment indexes and compared with the stored IDs as sets, so only
+        the orphans themselves are visited. Duplicates are the records dropped
+        by the last load_from_json. With quarantine=True the orphans and
+        duplicates are appended to quarantine_file (JSON Lines) and removed,
+        and the next save writes the cleaned collections.
+        """
+        missing_patients = self.patient_index.keys() - self.patients.keys()
+        missing_doctors = {doctor_id for doctor_id, _ in self.day_index} - self.doctors.keys()
+        
+        orphans = {}  # appointment_id -> reason
+        for patient_id in missing_patients:
+            for appointment_id in self.patient_index[patient_id]:
+                orphans[appointment_id] = f"missing patient {patient_id}"
+        if missing_doctors:
+            for (doctor_id, _), day in self.day_index.items():
+                if doctor_id in missing_doctors:
+                    for _, appointment_id in day:
+                        orphans[appointment_id] = f"missing doctor {doctor_id}"
+        
+        duplicates = {
+            name: [getattr(record, COLLECTIONS[name][1][0]) for record in records]
+            for name, records in self.duplicates.items()
+        }
+        report = {
+            "missing_patients": missing_patients,
+            "missing_doctors": missing_doctors,
+            "orphans": orphans,
+            "duplicates": duplicates,
+        }
+        if not quarantine or not (orphans or any(duplicates.values())):
+            return report
+        
+        entries = [
+            {"collection": "appointments", "reason": reason, "record": self.appointments[appointment_id].to_dict()}
+            for appointment_id, reason in orphans.items()
+        ]
+        for name, records in self.duplicates.items():
+            entries.extend({"collection": name, "reason": "duplicate ID", "record": record.to_dict()} for record in records)
+        with open(quarantine_file, "a", encoding="utf-8") as file:
+            file.writelines(json.dumps(entry) + "\n" for entry in entries)
+            file.flush()
+            os.fsync(file.fileno())
+        
+        # Only drop them once they are safely in the quarantine file
+        for appointment_id in orphans:
+            self._unindex_appointment(self.appointments.pop(appointment_id))
+            self.dirty["appointments"][appointment_id] = None
+        for name, record_ids in duplicates.items():
+            for record_id in record_ids:
+                self.dirty[name][record_id] = None  # The file still has the extra copies
+            self.duplicates[name] = []
+        return report
+    
+    def import_csv(self, name, path, batch_size=50000):
+        """Bulk import patients, doctors or appointments from a CSV file
+        
+        The first row names the columns, in any order (extra columns are
+        ignored). Rows are streamed with csv.reader and checked a batch at a
+        time. Rows without an ID get one from the ID allocator, above every ID
+        the file gives; a row whose ID is already stored replaces that record,
+        and an ID repeated within the file is an error. Appointments must point
+        at patients and doctors that are already loaded. Nothing is stored
+        until the whole file has been read, so a read error leaves the
+        collection as it was. Derived indexes are rebuilt once at the end.
+        Returns (rows imported, [(line, error), ...]).
+        """
+        with gc_paused():
+            return self._import_csv(name, path, batch_size)
+    
+    def _import_csv(self, name, path, batch_size):
+        record_class, fields, kind = COLLECTIONS[name]
+        records = getattr(self, name)
+        dirty = self.dirty[name]
+        errors = []
+        
+        with open(path, "r", newline="", encoding="utf-8-sig") as file:
+            reader = csv.reader(file)
+            header = [column.strip() for column in next(reader, [])]
+            missing = [field for field in fields[1:] if field not in header]
+            if missing:
+                errors.append((1, f"missing column(s): {', '.join(missing)}"))
+                return 0, errors
+            has_ids = fields[0] in header
+            pick = operator.itemgetter(*(header.index(field) for field in fields if field in header))
+            width = len(header)
+            line = 1
+            staged = {}  # Records with an ID given in the file, stored once the whole file has been read
+            unassigned = []  # Rows without an ID, numbered once every ID in the file has been seen
             
-            # Load appointments  
-            with open(appointment_file, "r", encoding="utf-8") as file:
-                appointments_data = json.load(file)
-                self.appointments = [Appointment(**data) for data in appointments_data]
+            for batch in iter_batches(reader, batch_size):
+                # Row shape and empty values, one row at a time
+                lines = []
+                values = []
+                for row in batch:
+                    line += 1
+                    if len(row) != width:
+                        if row:  # Blank lines are skipped quietly
+                            errors.append((line, f"expected {width} columns, found {len(row)}"))
+                        continue
+                    value = pick(row)
+                    if not has_ids:
+                        value = ("",) + value
+                    if "" in value[1:]:
+                        errors.append((line, "empty value"))
+                        continue
+                    lines.append(line)
+                    values.append(value)
+                
+                # Appointment references and formats, once per distinct value in the batch
+                if name == "appointments" and values:
+                    bad = [
+                        ("unknown patient", 1, {value[1] for value in values} - self.patients.keys()),
+                        ("unknown doctor", 2, {value[2] for value in values} - self.doctors.keys()),
+                        ("invalid date", 3, {date for date in {value[3] for value in values} if not valid_date(date)}),
+                        ("invalid time", 4, {time for time in {value[4] for value in values} if not valid_time(time)}),
+                    ]
+                    bad = [check for check in bad if check[2]]
+                    if bad:
+                        kept_lines = []
+                        kept = []
+                        for line_number, value in zip(lines, values):
+                            problem = next((f"{message}: {value[index]}" for message, index, wrong in bad
+                                            if value[index] in wrong), None)
+                            if problem:
+                                errors.append((line_number, problem))
+                            else:
+                                kept_lines.append(line_number)
+                                kept.append(value)
+                        lines, values = kept_lines, kept
+                
+                # Build the records that have an ID, a repeat is reported instead of replacing the earlier row
+                for line_number, value in zip(lines, values):
+                    record_id = value[0]
+                    if not record_id:
+                        unassigned.append(value)
+                    elif record_id in staged:
+                        errors.append((line_number, f"duplicate ID {record_id} in file"))
+                    else:
+                        staged[record_id] = record_class(*value)
         
-        except FileNotFoundError:
-            print("File not found")
+        records.update(staged)
+        dirty.update(dict.fromkeys(staged))
+        self.ids.observe(kind, staged)
+        imported = len(staged)
+        
+        # One block of new IDs, above every ID the file gave, for the rows missing one
+        for record_id, value in zip(self.ids.reserve(kind, len(unassigned)), unassigned):
+            records[record_id] = record_class(record_id, *value[1:])
+            dirty[record_id] = None
+        imported += len(unassigned)
+        
+        self.rebuild_indexes(name)
+        errors.sort()
+        return imported, errors
+    
+    def export_csv(self, name, path):
+        """Stream one collection to a CSV file with a header row, replacing the file atomically"""
+        record_class, fields, _ = COLLECTIONS[name]
+        records = getattr(self, name).values()
+        
+        def write(file):
+            writer = csv.writer(file)
+            writer.writerow(fields)
+            writer.writerows(map(record_class.row_getter, records))
+        
+        write_atomic(path, write, newline="")
+        return len(records)
 
 
 def main():
     """Main function"""
     hospital = Hospital()
     
-    def generate_patient_id(hospital):
-        """Generate a unique patient ID"""
-        while True:
-            patient_id = str(random.randint(1000, 9999))
-            if not any(patient.patient_id == patient_id for patient in hospital.patients):
-                return patient_id
-
-    def generate_doctor_id(hospital):
-        """Generate a unique doctor ID"""
-        while True:
-            doctor_id = str(random.randint(1000, 9999))
-            if not any(doctor.doctor_id == doctor_id for doctor in hospital.doctors):
-                return doctor_id
-
-    def generate_appointment_id(hospital):
-        """Generate a unique appointment ID"""
-        while True:
-            appointment_id = str(random.randint(1000, 9999))
-            if not any(appointment.appointment_id == appointment_id for appointment in hospital.appointments):
-                return appointment_id
-            
     print("\nWelcome to the Hospital Management System")
     
     while True:
@@ -202,13 +1082,19 @@ def main():
         print("6. View Appointments")
         print("7. Save Data")
         print("8. Load Data")
-        print("9. Exit")
+        print("9. Import CSV")
+        print("10. Export CSV")
+        print("11. Doctor Day Sheet")
+        print("12. Patient Appointments")
+        print("13. Validate Data")
+        print("14. Doctor Load Report")
+        print("15. Exit")
         
-        choice = input("Enter your choice (1-9): ").strip()
+        choice = input("Enter your choice (1-15): ").strip()
         
         if choice == "1":
             # Add patient
-            patient_id = generate_patient_id(hospital)
+            patient_id = hospital.ids.allocate("patient")
             name = input("Enter patient name: ").strip()
             age = input("Enter Patient age: ").strip()
             gender = input("Enter patient gender: ").strip()
@@ -217,7 +1103,7 @@ def main():
         
         elif choice == "2":
             # Add Doctor
-            doctor_id = generate_doctor_id(hospital)
+            doctor_id = hospital.ids.allocate("doctor")
             name = input("Enter Doctor name: ").strip()
             specialization = input("Enter Doctor specialization: ").strip()
             available_days = input("Enter doctor available days: ").strip()
@@ -230,7 +1116,7 @@ def main():
             doctor_id = input("Enter Doctor ID: ").strip()
             date = input("Enter Appointment Date (YYYY-MM-DD): ")
             time = input("Enter Appointment Time (HH:MM): ")
-            appointment_id = generate_appointment_id(hospital)
+            appointment_id = hospital.ids.allocate("appointment")
             appointment = Appointment(appointment_id, patient_id, doctor_id, date, time)
             hospital.book_appointment(appointment)
         
@@ -253,7 +1139,94 @@ def main():
         elif choice == "8":
             hospital.load_from_json()
         
-        elif choice == "9":
+        elif choice in ("9", "10"):
+            # Import/export one collection as CSV
+            name = input("Enter data to use (patients/doctors/appointments): ").strip().lower()
+            if name not in COLLECTIONS:
+                print("Invalid choice")
+                continue
+            path = input(f"Enter CSV file [{name}.csv]: ").strip() or f"{name}.csv"
+            try:
+                if choice == "9":
+                    imported, errors = hospital.import_csv(name, path)
+                    for line, error in errors[:20]:
+                        print(f"Line {line}: {error}")
+                    if len(errors) > 20:
+                        print(f"... and {len(errors) - 20} more errors")
+                    print(f"Imported {imported} {name} from {path}")
+                else:
+                    exported = hospital.export_csv(name, path)
+                    print(f"Exported {exported} {name} to {path}")
+            except (OSError, UnicodeDecodeError, csv.Error) as e:
+                print(f"Could not use {path}: {e}")
+        
+        elif choice == "11":
+            # One doctor's appointments for a day
+            doctor_id = input("Enter Doctor ID: ").strip()
+            date = input("Enter Date (YYYY-MM-DD): ").strip()
+            start_time = input("From time (HH:MM, blank for start of day): ").strip() or None
+            end_time = input("To time (HH:MM, blank for end of day): ").strip() or None
+            day = hospital.day_sheet(doctor_id, date, start_time, end_time)
+            if not day:
+                print("No appointment booked.")
+            for appointment in day:
+                print(appointment.display_details())
+        
+        elif choice == "12":
+            # One patient's appointments
+            patient_id = input("Enter Patient ID: ").strip()
+            booked = hospital.patient_appointments(patient_id)
+            if not booked:
+                print("No appointment booked.")
+            for appointment in booked:
+                print(appointment.display_details())
+        
+        elif choice == "13":
+            # Referential integrity and duplicate IDs
+            quarantine = input("Quarantine problem records? (y/n): ").strip().lower() == "y"
+            report = hospital.validate(quarantine=quarantine)
+            print(f"Appointments with a missing patient or doctor: {len(report['orphans'])}")
+            for appointment_id, reason in list(report["orphans"].items())[:20]:
+                print(f"  {appointment_id}: {reason}")
+            for name, record_ids in report["duplicates"].items():
+                if record_ids:
+                    print(f"Duplicate {name} IDs: {', '.join(record_ids[:20])}")
+            if quarantine and (report["orphans"] or any(report["duplicates"].values())):
+                print("Problem records moved to quarantine.jsonl, save to write the cleaned data")
+        
+        elif choice == "14":
+            # Appointments per doctor against availability
+            period = input("Group by (day/week): ").strip().lower() or "day"
+            if period not in ("day", "week"):
+                print("Invalid choice")
+                continue
+            start_date = input("From date (YYYY-MM-DD, blank for all): ").strip() or None
+            end_date = input("To date (YYYY-MM-DD, blank for all): ").strip() or None
+            rows, peak_hours = hospital.doctor_load(period, start_date, end_date)
+            if not rows:
+                print("No appointment booked.")
+                continue
+            for row in rows[:50]:
+                if row["capacity"] == 0:
+                    utilization = "outside availability"
+                elif row["utilization"] is None:
+                    utilization = "unknown"
+                else:
+                    utilization = f"{row['utilization']:.0%}"
+                print(f"Doctor {row['doctor_id']} {row['name']}, {row['period']}: "
+                      f"{row['appointments']} appointments, utilization {utilization}")
+            if len(rows) > 50:
+                print(f"... and {len(rows) - 50} more rows")
+            print("Peak hours: " + ", ".join(f"{hour}:00 ({count})" for hour, count in peak_hours.most_common(5)))
+            path = input("Export to CSV file (blank to skip): ").strip()
+            if path:
+                try:
+                    export_doctor_load(rows, path)
+                    print(f"Exported {len(rows)} rows to {path}")
+                except OSError as e:
+                    print(f"Could not use {path}: {e}")
+        
+        elif choice == "15":
             # Exit
             print("Exiting system. Goodbye")
             break
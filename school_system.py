@@ -1,8 +1,134 @@
+import csv
 import random
 import re
 import json 
-import matplotlib.pyplot as plt
-from openpyxl import Workbook
+import math
+import threading
+from bisect import bisect_left, insort
+
+
+def prewarm_imports():
+    """Import matplotlib and openpyxl in the background.
+
+    They are only needed by the visualize and export options, so they are
+    loaded after the menu is shown instead of at startup.
+    """
+    def worker():
+        try:
+            import matplotlib.pyplot  # noqa: F401
+            import openpyxl  # noqa: F401
+        except ImportError:
+            pass
+
+    threading.Thread(target=worker, daemon=True).start()
+
+
+class RankedList:
+    """Sorted list of keys stored in small buckets.
+
+    Adding or removing a key only shifts one bucket, so rankings can be
+    kept up to date on every grade change instead of sorting on demand.
+    """
+    LOAD = 500
+
+    def __init__(self):
+        self._buckets = []
+        self._maxes = []
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    def add(self, key):
+        """Insert a key in sorted position."""
+        if not self._buckets:
+            self._buckets.append([key])
+            self._maxes.append(key)
+            self._len += 1
+            return
+
+        pos = bisect_left(self._maxes, key)
+        if pos == len(self._maxes):
+            pos -= 1
+            self._buckets[pos].append(key)
+            self._maxes[pos] = key
+        else:
+            insort(self._buckets[pos], key)
+        self._len += 1
+
+        bucket = self._buckets[pos]
+        if len(bucket) > 2 * self.LOAD:
+            half = bucket[self.LOAD:]
+            del bucket[self.LOAD:]
+            self._maxes[pos] = bucket[-1]
+            self._buckets.insert(pos + 1, half)
+            self._maxes.insert(pos + 1, half[-1])
+
+    def remove(self, key):
+        """Remove a key, returning False if it is not present."""
+        pos = bisect_left(self._maxes, key)
+        if pos == len(self._maxes):
+            return False
+        bucket = self._buckets[pos]
+        index = bisect_left(bucket, key)
+        if index == len(bucket) or bucket[index] != key:
+            return False
+
+        del bucket[index]
+        self._len -= 1
+        if bucket:
+            self._maxes[pos] = bucket[-1]
+        else:
+            del self._buckets[pos]
+            del self._maxes[pos]
+        return True
+
+    def update(self, removed, added):
+        """Remove and add many keys, sorting once when that beats moving them one at a time."""
+        if len(removed) + len(added) < self._len // 16:
+            for key in removed:
+                self.remove(key)
+            for key in added:
+                self.add(key)
+            return
+
+        removed = set(removed)
+        keys = [key for bucket in self._buckets for key in bucket if key not in removed]
+        keys.extend(added)
+        keys.sort()
+        self._buckets = [keys[start:start + self.LOAD] for start in range(0, len(keys), self.LOAD)]
+        self._maxes = [bucket[-1] for bucket in self._buckets]
+        self._len = len(keys)
+
+    def index(self, key):
+        """Return the 0-based position of a key, or None if it is not present."""
+        pos = bisect_left(self._maxes, key)
+        if pos == len(self._maxes):
+            return None
+        bucket = self._buckets[pos]
+        index = bisect_left(bucket, key)
+        if index == len(bucket) or bucket[index] != key:
+            return None
+        return sum(len(previous) for previous in self._buckets[:pos]) + index
+
+    def first(self, count):
+        """Return the smallest `count` keys in order."""
+        result = []
+        for bucket in self._buckets:
+            if len(result) >= count:
+                break
+            result.extend(bucket[:count - len(result)])
+        return result
+
+    def last(self, count):
+        """Return the largest `count` keys, largest first."""
+        result = []
+        for bucket in reversed(self._buckets):
+            if len(result) >= count:
+                break
+            result.extend(reversed(bucket[-(count - len(result)):]))
+        return result
+
 
 def school_system():
     """_summary_
@@ -11,6 +137,52 @@ def school_system():
         _type_: _description_
     """
     students = {}
+    # Running totals per student, kept in step with students[...]["grades"]
+    stats = {}
+    
+    def empty_stats():
+        return {"sum": 0.0, "count": 0, "min": None, "max": None}
+    
+    # Rankings keyed by (-average, ID) and per subject by (-grade, ID),
+    # so the best student always comes first
+    leaderboard = RankedList()
+    subject_boards = {}
+    rank_keys = {}
+    
+    def update_rank(student_id):
+        # Move the student to their current place on the leaderboard
+        old_key = rank_keys.pop(student_id, None)
+        if old_key is not None:
+            leaderboard.remove(old_key)
+        entry = stats.get(student_id)
+        if entry and entry["count"]:
+            key = (-(entry["sum"] / entry["count"]), student_id)
+            leaderboard.add(key)
+            rank_keys[student_id] = key
+    
+    def update_subject_rank(student_id, subject, old_grade, grade):
+        # Move the student within a subject's ranking
+        board = subject_boards.setdefault(subject, RankedList())
+        if old_grade is not None:
+            board.remove((-old_grade, student_id))
+        if grade is not None:
+            board.add((-grade, student_id))
+        if not board:
+            del subject_boards[subject]
+    
+    def rebuild_stats(student_id):
+        # Compute totals and rankings for a newly loaded student
+        grades = students[student_id]["grades"]
+        entry = empty_stats()
+        if grades:
+            entry["sum"] = float(sum(grades.values()))
+            entry["count"] = len(grades)
+            entry["min"] = min(grades.values())
+            entry["max"] = max(grades.values())
+        stats[student_id] = entry
+        for subject, grade in grades.items():
+            update_subject_rank(student_id, subject, None, grade)
+        update_rank(student_id)
     
     def load_data():
         # Load data fromJSON file
@@ -18,6 +190,15 @@ def school_system():
             with open("student.json", "r", encoding="utf-8") as file:
                 loaded_data = json.load(file)
                 students.update(loaded_data)
+                # json.load accepts NaN and Infinity, which would poison the totals and rankings
+                bad = [(student_id, subject) for student_id, student in students.items()
+                       for subject, grade in student["grades"].items() if not math.isfinite(grade)]
+                for student_id, subject in bad:
+                    del students[student_id]["grades"][subject]
+                if bad:
+                    print(f"Skipped {len(bad)} saved grade(s) that are not numbers")
+                for student_id in students:
+                    rebuild_stats(student_id)
                 print("Data loaded successfully")
         except FileNotFoundError:
             print("Error: No data saved found")
@@ -46,12 +227,78 @@ def school_system():
             return False
         return True
     
+    def set_grade(student_id, subject, grade, rank=True):
+        # Store a grade and update the student's totals in O(1), returning the old grade
+        # Bulk imports pass rank=False and call apply_rank_changes once afterwards
+        grades = students[student_id]["grades"]
+        entry = stats[student_id]
+        old_grade = grades.get(subject)
+        grades[subject] = grade
+        
+        if old_grade is None:
+            entry["sum"] += grade
+            entry["count"] += 1
+        else:
+            entry["sum"] += grade - old_grade
+        
+        if old_grade is not None and old_grade in (entry["min"], entry["max"]):
+            # The old grade may have been the only min/max, rescan this student
+            entry["min"] = min(grades.values())
+            entry["max"] = max(grades.values())
+        else:
+            if entry["min"] is None or grade < entry["min"]:
+                entry["min"] = grade
+            if entry["max"] is None or grade > entry["max"]:
+                entry["max"] = grade
+        
+        if rank:
+            update_subject_rank(student_id, subject, old_grade, grade)
+            update_rank(student_id)
+        return old_grade
+    
+    def apply_rank_changes(changes):
+        # Bring the rankings up to date after a bulk import, one update per board
+        # changes maps (student_id, subject) to the grade before the import
+        removed = {}
+        added = {}
+        for (student_id, subject), old_grade in changes.items():
+            grade = students[student_id]["grades"][subject]
+            if grade == old_grade:
+                continue
+            if old_grade is not None:
+                removed.setdefault(subject, []).append((-old_grade, student_id))
+            added.setdefault(subject, []).append((-grade, student_id))
+        for subject in removed.keys() | added.keys():
+            board = subject_boards.setdefault(subject, RankedList())
+            board.update(removed.get(subject, []), added.get(subject, []))
+        
+        touched = {student_id for student_id, _ in changes}
+        old_keys = [rank_keys.pop(student_id) for student_id in touched if student_id in rank_keys]
+        new_keys = []
+        for student_id in touched:
+            entry = stats[student_id]
+            if entry["count"]:
+                rank_keys[student_id] = (-(entry["sum"] / entry["count"]), student_id)
+                new_keys.append(rank_keys[student_id])
+        leaderboard.update(old_keys, new_keys)
+    
+    def get_average(student_id):
+        # Read a student's average from the running totals
+        entry = stats[student_id]
+        if not entry["count"]:
+            return None
+        return entry["sum"] / entry["count"]
+    
     def generate_id():
         # Generate ID for student
         while True:
             student_id = str(random.randint(10000, 99999))
             if student_id not in students:
                 return student_id
+    
+    def highest_id():
+        # Highest numeric ID in use, new IDs for bulk imports are numbered after it
+        return max((int(sid) for sid in students if sid.isdigit()), default=9999)
             
     def add_student():
         # Add student to system
@@ -74,6 +321,7 @@ def school_system():
             "name": name,
             "grades": {}
         }
+        stats[student_id] = empty_stats()
         
         print("\nStudent Added Successfully")
         print(f"Student Name: {name}")
@@ -96,13 +344,13 @@ def school_system():
         
         try:
             grade = float(input(f"Enter grade for {subject}: ").strip())
-            if grade < 0 or grade > 100:
+            if not math.isfinite(grade) or grade < 0 or grade > 100:
                 print("Error: Grade should be between 0-100")
                 return
         except ValueError:
             print("Invalid input. Please input a number")
             return
-        students[student_id]["grades"][subject] = grade
+        set_grade(student_id, subject, grade)
         print(f"Grade for {subject} added successfully!")
     
     def add_multiple_grade():
@@ -125,18 +373,120 @@ def school_system():
             try:
                 subject, grade = entry.split(":")
                 subject = subject.strip()
-                grade = float(grade.strip())
+                grade, error = parse_grade(grade.strip())
                 
-                if grade < 0 or grade > 100:
-                    print(f"Error: Grade for {subject} should be between 0-100")
+                if error:
+                    print(f"Error: Grade for {subject}: {error}")
                     continue
                 
-                students[student_id]["grades"][subject] = grade
+                set_grade(student_id, subject, grade)
                 print(f"Grade for {subject} added successfully")
                 
             except ValueError:
                 print("Invalid input")  
     
+    def parse_grade(value):
+        # Parse a gradebook cell, returning (grade, error)
+        try:
+            grade = float(value)
+        except ValueError:
+            return None, "not a number"
+        if not math.isfinite(grade):
+            return None, "not a number"
+        if grade < 0 or grade > 100:
+            return None, "grade should be between 0-100"
+        return grade, None
+    
+    def import_grades_from_file():
+        # Import grades from a CSV/TSV gradebook file
+        path = input("Enter gradebook file path (.csv or .tsv): ").strip()
+        if not path:
+            print("Error: File path cannot be empty")
+            return
+        
+        delimiter = "\t" if path.lower().endswith((".tsv", ".tab")) else ","
+        pending = []
+        invalid = []
+        
+        try:
+            with open(path, "r", encoding="utf-8", newline="") as file:
+                reader = csv.reader(file, delimiter=delimiter)
+                header = [column.strip() for column in next(reader, [])]
+                if len(header) < 2:
+                    print("Error: Gradebook needs a student ID column and at least one subject")
+                    return
+                
+                columns = [column.lower().replace(" ", "_") for column in header]
+                long_format = columns[:3] == ["student_id", "subject", "grade"]
+                
+                # Long format: student_id,subject,grade per row
+                # Wide format: student_id,[name,]subject1,subject2,... per row
+                subject_columns = [
+                    (index, header[index]) for index in range(1, len(header))
+                    if columns[index] != "name"
+                ]
+                
+                for line_no, row in enumerate(reader, start=2):
+                    if not row:
+                        continue
+                    student_id = row[0].strip()
+                    if student_id not in students:
+                        invalid.append((line_no, header[0], student_id, "student ID not found"))
+                        continue
+                    
+                    if long_format:
+                        if len(row) < 3 or not row[1].strip():
+                            invalid.append((line_no, header[1], "", "missing subject or grade"))
+                            continue
+                        grade, error = parse_grade(row[2])
+                        if error:
+                            invalid.append((line_no, row[1].strip(), row[2], error))
+                            continue
+                        pending.append((student_id, row[1].strip(), grade))
+                        continue
+                    
+                    for index, subject in subject_columns:
+                        if index >= len(row) or not row[index].strip():
+                            continue
+                        grade, error = parse_grade(row[index])
+                        if error:
+                            invalid.append((line_no, subject, row[index], error))
+                            continue
+                        pending.append((student_id, subject, grade))
+        except FileNotFoundError:
+            print("Error: Gradebook file not found")
+            return
+        except (UnicodeDecodeError, csv.Error) as e:
+            print(f"Error: Could not read gradebook: {e}")
+            return
+        
+        if invalid:
+            print(f"\n{len(invalid)} invalid cell(s) found:")
+            for line_no, column, value, reason in invalid[:20]:
+                print(f"Line {line_no}, {column}: '{value}' ({reason})")
+            if len(invalid) > 20:
+                print(f"... and {len(invalid) - 20} more")
+            
+            if not pending:
+                print("No valid grades to import")
+                return
+            confirm = input(f"Import the {len(pending)} valid grade(s) anyway? (y/n): ").strip().lower()
+            if confirm != "y":
+                print("Import cancelled. No grades were changed")
+                return
+        
+        if not pending:
+            print("No grades found in file")
+            return
+        
+        # Everything was parsed and checked above, so apply in one go
+        changes = {}
+        for student_id, subject, grade in pending:
+            old_grade = set_grade(student_id, subject, grade, rank=False)
+            changes.setdefault((student_id, subject), old_grade)
+        apply_rank_changes(changes)
+        print(f"{len(pending)} grade(s) imported successfully")
+    
     def view_student_details():
         # View student details
         student_id = input("Enter student ID: ").strip()  
@@ -164,7 +514,11 @@ def school_system():
         if student_id not in students:
             print("Error: Student ID not found") 
             return
+        for subject, grade in students[student_id]["grades"].items():
+            update_subject_rank(student_id, subject, grade, None)
         del students[student_id]
+        del stats[student_id]
+        update_rank(student_id)
         print(f"Student with {student_id} deleted from system")
     
     def view_all_students():
@@ -187,12 +541,11 @@ def school_system():
             return
         
         student = students[student_id]
-        if not student["grades"]:
+        average_grade = get_average(student_id)
+        if average_grade is None:
             print("No grades to show")
             return
         
-        total_average = sum(student["grades"].values())
-        average_grade = total_average / len(student['grades'])
         print(f"Average grade for {student["name"]}: {average_grade:.2f}") 
         
     def visualize_grade():
@@ -210,6 +563,8 @@ def school_system():
             print("No grades available for student")
             return
         
+        import matplotlib.pyplot as plt
+        
         subjects = list(student["grades"].keys())
         grades = list(student["grades"].values())
         
@@ -225,6 +580,8 @@ def school_system():
             print("No student data to export")
             return
 
+        from openpyxl import Workbook
+        
         wb = Workbook()
         ws = wb.active
         ws.title = "Students Data"
@@ -241,9 +598,170 @@ def school_system():
         filename = "students_data.xlsx"
         wb.save(filename)
         print(f"Data exported successfully to {filename}")
+    
+    def print_ranking(keys, start=1):
+        # Print ranking keys of the form (-score, student_id)
+        for position, (score, student_id) in enumerate(keys, start=start):
+            print(f"{position}. {students[student_id]['name']} (ID: {student_id}) - {-score:.2f}")
+    
+    def view_rankings():
+        # Show top/bottom students, a student's rank or a subject's top students
+        if not leaderboard:
+            print("No grades recorded yet")
+            return
+        
+        print("1. Top students")
+        print("2. Bottom students")
+        print("3. Rank of a student")
+        print("4. Top students in a subject")
+        option = input("Choose ranking: ").strip()
+        
+        if option == "3":
+            student_id = input("Enter student ID: ").strip()
+            if student_id not in students:
+                print("Error: Student ID not found")
+                return
+            if student_id not in rank_keys:
+                print("Student has no grades yet")
+                return
+            rank = leaderboard.index(rank_keys[student_id]) + 1
+            print(f"{students[student_id]['name']} is ranked {rank} of {len(leaderboard)}")
+            return
+        
+        if option not in ("1", "2", "4"):
+            print("Invalid Input")
+            return
+        
+        try:
+            count = int(input("How many students: ").strip())
+            if count < 1:
+                raise ValueError
+        except ValueError:
+            print("Invalid input. Please input a positive number")
+            return
+        
+        if option == "1":
+            print_ranking(leaderboard.first(count))
+        elif option == "2":
+            keys = leaderboard.last(count)
+            print_ranking(keys[::-1], start=len(leaderboard) - len(keys) + 1)
+        else:
+            subject = input("Enter Subject name: ").strip()
+            if subject not in subject_boards:
+                print("Error: No grades recorded for that subject")
+                return
+            print_ranking(subject_boards[subject].first(count))
+    
+    def cell_text(value):
+        # Excel stores typed IDs as numbers, so 21288 can come back as 21288.0
+        if value is None:
+            return ""
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        return str(value).strip()
+    
+    def import_from_excel():
+        # Stream students and grades from an Excel workbook
+        from openpyxl import load_workbook
+        
+        filename = input("Enter Excel file path (default students_data.xlsx): ").strip()
+        filename = filename or "students_data.xlsx"
+        
+        try:
+            wb = load_workbook(filename, read_only=True, data_only=True)
+        except FileNotFoundError:
+            print("Error: Excel file not found")
+            return
+        except Exception as e:
+            print(f"Error: Could not open Excel file: {e}")
+            return
+        
+        added = updated = grades_added = 0
+        invalid = []
+        changes = {}  # (student_id, subject) -> grade before the import, for apply_rank_changes
+        try:
+            rows = wb.active.iter_rows(values_only=True)
+            header = [cell_text(cell).lower() for cell in next(rows, ())]
+            if "name" not in header:
+                print("Error: Sheet needs a 'Name' column")
+                return
+            
+            id_column = header.index("student id") if "student id" in header else None
+            name_column = header.index("name")
+            pairs_column = header.index("subjects") if "subjects" in header else None
+            # Any other named column is treated as one subject per column
+            subject_columns = [
+                (index, title.title()) for index, title in enumerate(header)
+                if title and index not in (id_column, name_column, pairs_column)
+                and title != "grades"
+            ]
+            
+            names = {student["name"].lower(): sid for sid, student in students.items()}
+            next_id = highest_id() + 1  # Advanced locally, scanning every student per row would be quadratic
+            
+            for row_no, row in enumerate(rows, start=2):
+                name = cell_text(row[name_column]) if name_column < len(row) else ""
+                student_id = ""
+                if id_column is not None and id_column < len(row):
+                    student_id = cell_text(row[id_column])
+                if not name and not student_id:
+                    continue
+                
+                if student_id not in students:
+                    student_id = names.get(name.lower(), student_id)
+                
+                if student_id in students:
+                    updated += 1
+                else:
+                    if not validate_name(name):
+                        invalid.append((row_no, "Name", name, "name must be between 2-50 and alphabet"))
+                        continue
+                    # New IDs stay above any numeric ID a row brings, and skip any already taken
+                    if student_id.isdigit():
+                        next_id = max(next_id, int(student_id) + 1)
+                    while not student_id or student_id in students:
+                        student_id = str(next_id)
+                        next_id += 1
+                    students[student_id] = {"name": name, "grades": {}}
+                    stats[student_id] = empty_stats()
+                    names[name.lower()] = student_id
+                    added += 1
+                
+                cells = []
+                if pairs_column is not None and pairs_column < len(row) and row[pairs_column]:
+                    for pair in str(row[pairs_column]).split(","):
+                        subject, _, grade = pair.rpartition(":")
+                        cells.append((subject.strip(), grade))
+                for index, subject in subject_columns:
+                    if index < len(row) and row[index] is not None and row[index] != "":
+                        cells.append((subject, row[index]))
+                
+                for subject, value in cells:
+                    grade, error = parse_grade(value) if subject else (None, "missing subject")
+                    if error:
+                        invalid.append((row_no, subject, value, error))
+                        continue
+                    old_grade = set_grade(student_id, subject, grade, rank=False)
+                    changes.setdefault((student_id, subject), old_grade)
+                    grades_added += 1
+        except Exception as e:
+            print(f"Error: Could not read Excel file: {e}")
+            return
+        finally:
+            wb.close()
+            apply_rank_changes(changes)
+        
+        print(f"Import finished: {added} student(s) added, {updated} updated, {grades_added} grade(s) imported")
+        if invalid:
+            print(f"{len(invalid)} invalid cell(s) skipped:")
+            for row_no, column, value, reason in invalid[:20]:
+                print(f"Row {row_no}, {column}: '{value}' ({reason})")
+            if len(invalid) > 20:
+                print(f"... and {len(invalid) - 20} more")
         
             
                        
+    prewarm_started = False
     try:
         while True:
             print("\n===Welcome to Femi School===")
@@ -257,7 +775,14 @@ def school_system():
             print("8. Calculate average")
             print("9. Visualize Data")
             print("10. Export data")
-            print("11. Exit")
+            print("11. Import grades from file")
+            print("12. Import data from Excel")
+            print("13. View rankings")
+            print("14. Exit")
+            
+            if not prewarm_started:
+                prewarm_imports()
+                prewarm_started = True
             
             choice = input("Enter your choice: ").strip()
             
@@ -282,6 +807,12 @@ def school_system():
             elif choice == "10":
                 export_to_excel()
             elif choice == "11":
+                import_grades_from_file()
+            elif choice == "12":
+                import_from_excel()
+            elif choice == "13":
+                view_rankings()
+            elif choice == "14":
                 print("Exit Program")
                 break
             else: